@@ -6,7 +6,14 @@
 import time
 import os
 import re
-from typing import List, Any, Dict
+import asyncio
+import orjson
+import aiofiles
+import aiofiles.os
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from functools import lru_cache
+from typing import List, Any, Dict, Optional, Tuple
 from pathlib import Path
 from fastapi import APIRouter, UploadFile, File, Form, HTTPException, BackgroundTasks
 from fastapi.responses import FileResponse
@@ -24,11 +31,15 @@ from app.models.schemas import (
     ModelListResponse,
     MoodType,
     LayoutType,
+    RichTextContent,
+    BackgroundSettings,
+    TextPosition,
 )
 from app.services.bookmark_generator import bookmark_generator
 from app.services.vision_adapter import VisionAnalyzerFactory, VisionModel
 from app.services.image_generator import image_generator
 from app.utils.helpers import (
+    build_upload_filename,
     save_upload_file_tmp,
     validate_image_file,
     cleanup_all_temp_files,
@@ -40,34 +51,157 @@ from app.core.config import settings
 # 辅助函数
 # ============================================
 
+# 预构建枚举值到成员的映射，热路径上用dict查找替代Enum.__call__
+_MOOD_BY_VALUE = {m.value: m for m in MoodType}
+_LAYOUT_BY_VALUE = {l.value: l for l in LayoutType}
+_VISION_MODEL_BY_VALUE = {v.value: v for v in VisionModel}
+
+# 预编译驼峰转蛇形的正则，避免每个key都重新查找/编译模式
+_CAMEL_RE = re.compile(r'([A-Z])')
+
+# 预编译文件名安全检查：路径分隔符或".."即视为非法（单次扫描）
+_UNSAFE_FILENAME_RE = re.compile(r'[\\/]|\.\.')
+
+
+@lru_cache(maxsize=512)
+def _camel_to_snake_key(key: str) -> str:
+    """转换单个key（JSON key集合有限且高度重复，用LRU缓存避免重复正则）"""
+    # 已经是全小写（如蛇形命名）的key无需正则处理，直接返回
+    if key.islower():
+        return key
+    # 转换为蛇形命名，并移除开头的下划线（如果有的话）
+    return _CAMEL_RE.sub(r'_\1', key).lower().lstrip('_')
+
+
 def convert_camel_to_snake(data: Any) -> Any:
     """
-    递归转换字典中的驼峰命名为蛇形命名
+    转换字典中的驼峰命名为蛇形命名（显式栈迭代，避免深层嵌套的递归开销）
 
     例如: { "backgroundType": "solid" } -> { "background_type": "solid" }
     """
     if isinstance(data, dict):
-        result = {}
-        for key, value in data.items():
-            # 将驼峰命名转换为蛇形命名
-            snake_key = re.sub('([A-Z])', r'_\1', key).lower()
-            # 移除开头的下划线（如果有的话）
-            snake_key = snake_key.lstrip('_')
-
-            # 递归处理嵌套的字典和列表
-            result[snake_key] = convert_camel_to_snake(value)
-        return result
+        root: Any = {}
     elif isinstance(data, list):
-        return [convert_camel_to_snake(item) for item in data]
+        root = [None] * len(data)
     else:
         return data
 
+    # 栈元素: (源容器, 目标容器)
+    stack = [(data, root)]
+    while stack:
+        src, dst = stack.pop()
+        items = (
+            ((_camel_to_snake_key(k), v) for k, v in src.items())
+            if isinstance(src, dict)
+            else enumerate(src)
+        )
+        for key, value in items:
+            # 嵌套的字典和列表入栈，稍后继续展开
+            if isinstance(value, dict):
+                child: Any = {}
+                dst[key] = child
+                stack.append((value, child))
+            elif isinstance(value, list):
+                child = [None] * len(value)
+                dst[key] = child
+                stack.append((value, child))
+            else:
+                dst[key] = value
+
+    return root
+
+
+def _parse_rich_text(raw: str) -> RichTextContent:
+    """解析富文本JSON（在线程池中执行）"""
+    return RichTextContent(**orjson.loads(raw))
+
+
+def _parse_background(raw: str) -> BackgroundSettings:
+    """解析背景设置JSON，转换驼峰命名为蛇形命名（在线程池中执行）"""
+    return BackgroundSettings(**convert_camel_to_snake(orjson.loads(raw)))
+
+
+def _parse_text_position(raw: str) -> TextPosition:
+    """解析文本位置设置JSON，转换驼峰命名为蛇形命名（在线程池中执行）"""
+    return TextPosition(**convert_camel_to_snake(orjson.loads(raw)))
+
+
+async def _async_none():
+    """占位协程，返回None（用于gather中跳过未提供的字段）"""
+    return None
+
+
+async def _save_and_validate(upload: UploadFile, max_size: int) -> Tuple[str, int]:
+    """
+    流式保存上传文件到临时目录，同时校验文件大小
+
+    分块读取（64KB）边写边计数，避免将整个文件载入内存；
+    一旦超过max_size立即删除半成品文件并中止。
+
+    Args:
+        upload: FastAPI UploadFile对象
+        max_size: 最大允许字节数
+
+    Returns:
+        (保存的文件路径, 文件总字节数)
+    """
+    settings.TEMP_DIR.mkdir(parents=True, exist_ok=True)
+
+    # 复用helpers的命名逻辑：净化路径分隔符 + 序号防同秒冲突
+    filename = build_upload_filename(upload.filename)
+    file_path = settings.TEMP_DIR / filename
+
+    total_size = 0
+    try:
+        async with aiofiles.open(file_path, "wb") as f:
+            while chunk := await upload.read(64 * 1024):
+                total_size += len(chunk)
+                if total_size > max_size:
+                    logger.error(f"❌ [HELPER] File too large: {upload.filename}")
+                    raise HTTPException(
+                        status_code=400,
+                        detail=f"文件过大: {upload.filename}。"
+                              f"最大支持: {settings.MAX_UPLOAD_SIZE_MB:.1f}MB"
+                    )
+                await f.write(chunk)
+    except HTTPException:
+        file_path.unlink(missing_ok=True)
+        raise
+
+    return str(file_path), total_size
+
+
+# ============================================
+# 渲染进程池
+# ============================================
+
+# CPU密集的书签渲染派发到独立进程，避免阻塞事件循环
+_render_pool: Optional[ProcessPoolExecutor] = None
+
+
+def get_render_pool() -> ProcessPoolExecutor:
+    """获取渲染进程池（首次调用时创建）"""
+    global _render_pool
+    if _render_pool is None:
+        _render_pool = ProcessPoolExecutor(max_workers=settings.RENDER_WORKERS)
+        logger.info(f"✅ [POOL] Render process pool created ({settings.RENDER_WORKERS} workers)")
+    return _render_pool
+
+
+def shutdown_render_pool():
+    """关闭渲染进程池（应用关闭时调用）"""
+    global _render_pool
+    if _render_pool is not None:
+        _render_pool.shutdown(wait=False)
+        _render_pool = None
+        logger.info("✅ [POOL] Render process pool shut down")
+
 
 # 创建路由器
 router = APIRouter()
 
-# 记录启动时间
-start_time = time.time()
+# 记录启动时间（perf_counter单调参考，不受NTP时钟跳变影响）
+start_time = time.perf_counter()
 
 
 # ============================================
@@ -77,7 +211,7 @@ start_time = time.time()
 @router.get("/health", response_model=HealthResponse)
 async def health_check():
     """健康检查端点"""
-    uptime = time.time() - start_time
+    uptime = time.perf_counter() - start_time
     logger.debug("🏥 Health check requested")
     return HealthResponse(
         status="healthy",
@@ -105,11 +239,11 @@ async def analyze_reference_images(
     Returns:
         ImageAnalysisResult: 分析结果，包含布局、配色、字体等信息
     """
-    request_start = time.time()
-    logger.info("=" * 60)
+    request_start = time.perf_counter()
+    logger.debug("=" * 60)
     logger.info("📸 [ANALYZE] New request received")
-    logger.info(f"📸 [ANALYZE] Number of images: {len(images)}")
-    logger.info(f"🤖 [ANALYZE] Model: {model}")
+    logger.debug(f"📸 [ANALYZE] Number of images: {len(images)}")
+    logger.debug(f"🤖 [ANALYZE] Model: {model}")
 
     # 验证图片数量
     if len(images) < 1 or len(images) > 3:
@@ -119,17 +253,13 @@ async def analyze_reference_images(
             detail=f"请上传1-3张图片，当前上传了{len(images)}张"
         )
 
-    # 验证并保存图片
-    logger.info("✅ [ANALYZE] Image count validated")
-    image_paths = []
-    total_size = 0
-
+    # 验证文件类型（快速同步检查先行，避免浪费磁盘写入）
+    logger.debug("✅ [ANALYZE] Image count validated")
     for idx, img in enumerate(images):
-        logger.debug(f"📁 [ANALYZE] Processing image {idx + 1}/{len(images)}")
+        logger.debug(f"📁 [ANALYZE] Validating image {idx + 1}/{len(images)}")
         logger.debug(f"   - Filename: {img.filename}")
         logger.debug(f"   - Content-Type: {img.content_type}")
 
-        # 验证文件类型
         if not validate_image_file(img):
             logger.error(f"❌ [ANALYZE] Invalid file type: {img.content_type}")
             raise HTTPException(
@@ -138,59 +268,45 @@ async def analyze_reference_images(
                       f"支持的类型: {settings.ALLOWED_IMAGE_TYPES}"
             )
 
-        # 验证文件大小
-        content = await img.read()
-        file_size_mb = len(content) / (1024 * 1024)
-        total_size += len(content)
-        logger.debug(f"   - File size: {file_size_mb:.2f}MB")
-
-        if len(content) > settings.MAX_UPLOAD_SIZE:
-            logger.error(f"❌ [ANALYZE] File too large: {file_size_mb:.2f}MB")
-            raise HTTPException(
-                status_code=400,
-                detail=f"文件过大: {img.filename}。"
-                      f"最大支持: {settings.MAX_UPLOAD_SIZE / (1024*1024):.1f}MB"
-            )
-
-        # 保存到临时目录
-        img.file.seek(0)  # 重置文件指针
-        save_start = time.time()
-        file_path = await save_upload_file_tmp(img)
-        save_time = time.time() - save_start
-        logger.debug(f"   - Saved to: {file_path} (took {save_time:.2f}s)")
-        image_paths.append(file_path)
+    # 并发流式保存所有图片（单次遍历，不整体载入内存）
+    save_start = time.perf_counter()
+    save_results = await asyncio.gather(
+        *(_save_and_validate(img, settings.MAX_UPLOAD_SIZE) for img in images)
+    )
+    image_paths = [path for path, _ in save_results]
+    total_size = sum(size for _, size in save_results)
+    logger.debug(f"   - Saved {len(image_paths)} images in {time.perf_counter() - save_start:.2f}s")
 
-    logger.info(f"💾 [ANALYZE] All images saved, total size: {total_size / (1024*1024):.2f}MB")
+    logger.debug(f"💾 [ANALYZE] All images saved, total size: {total_size / (1024*1024):.2f}MB")
 
     # 验证模型参数
-    try:
-        vision_model = VisionModel(model.lower())
-    except ValueError:
+    vision_model = _VISION_MODEL_BY_VALUE.get(model.lower())
+    if vision_model is None:
         logger.error(f"❌ [ANALYZE] Invalid model: {model}")
         raise HTTPException(
             status_code=400,
             detail=f"不支持的模型: {model}。支持的模型: glm, qwen, claude"
         )
 
-    logger.info(f"🤖 [ANALYZE] Calling {vision_model.value.upper()} Vision API...")
+    logger.debug(f"🤖 [ANALYZE] Calling {vision_model.value.upper()} Vision API...")
 
     try:
         # 使用工厂获取对应模型的分析器
         analyzer = VisionAnalyzerFactory.get_analyzer(vision_model)
 
         # 调用模型API分析
-        model_start = time.time()
+        model_start = time.perf_counter()
         result = await analyzer.analyze_images(image_paths)
-        model_time = time.time() - model_start
+        model_time = time.perf_counter() - model_start
 
         logger.info(f"✅ [ANALYZE] {vision_model.value.upper()} API completed in {model_time:.2f}s")
-        logger.info(f"🎨 [ANALYZE] Palette: {result.colors.palette_name}")
-        logger.info(f"🎨 [ANALYZE] Layout: {result.layout.type.value}")
-        logger.info(f"🎨 [ANALYZE] Mood: {result.style_attributes.mood.value}")
+        logger.debug(f"🎨 [ANALYZE] Palette: {result.colors.palette_name}")
+        logger.debug(f"🎨 [ANALYZE] Layout: {result.layout.type.value}")
+        logger.debug(f"🎨 [ANALYZE] Mood: {result.style_attributes.mood.value}")
 
-        total_time = time.time() - request_start
+        total_time = time.perf_counter() - request_start
         logger.info(f"⏱️ [ANALYZE] Total request time: {total_time:.2f}s")
-        logger.info("=" * 60)
+        logger.debug("=" * 60)
 
         return result
 
@@ -232,43 +348,43 @@ async def text_to_image(
     Returns:
         dict: 包含生成的图片URL和下载路径
     """
-    request_start = time.time()
-    logger.info("=" * 60)
+    request_start = time.perf_counter()
+    logger.debug("=" * 60)
     logger.info("🎨 [TEXT2IMG] New request received")
-    logger.info(f"🎨 [TEXT2IMG] Prompt: {prompt}")
-    logger.info(f"🎨 [TEXT2IMG] Mood: {mood or 'None'}")
-    logger.info(f"🎨 [TEXT2IMG] Style: {style or 'None'}")
-    logger.info(f"🎨 [TEXT2IMG] Size: {size}")
+    logger.debug(f"🎨 [TEXT2IMG] Prompt: {prompt}")
+    logger.debug(f"🎨 [TEXT2IMG] Mood: {mood or 'None'}")
+    logger.debug(f"🎨 [TEXT2IMG] Style: {style or 'None'}")
+    logger.debug(f"🎨 [TEXT2IMG] Size: {size}")
 
     try:
         # 调用文生图服务
-        gen_start = time.time()
+        gen_start = time.perf_counter()
         image_url = await image_generator.generate_image(
             prompt=prompt,
             size=size,
             style=style,
             mood=mood
         )
-        gen_time = time.time() - gen_start
+        gen_time = time.perf_counter() - gen_start
 
         logger.info(f"✅ [TEXT2IMG] Image generated in {gen_time:.2f}s")
-        logger.info(f"✅ [TEXT2IMG] Image URL: {image_url}")
+        logger.debug(f"✅ [TEXT2IMG] Image URL: {image_url}")
 
         # 下载图片到本地
-        download_start = time.time()
+        download_start = time.perf_counter()
         image_path = await image_generator.download_image(image_url)
-        download_time = time.time() - download_start
+        download_time = time.perf_counter() - download_start
 
-        logger.info(f"💾 [TEXT2IMG] Downloaded in {download_time:.2f}s")
-        logger.info(f"💾 [TEXT2IMG] Local path: {image_path}")
+        logger.debug(f"💾 [TEXT2IMG] Downloaded in {download_time:.2f}s")
+        logger.debug(f"💾 [TEXT2IMG] Local path: {image_path}")
 
         # 构建下载URL
         filename = image_path.name
         download_url = f"{settings.API_V1_STR}/downloads/{filename}"
 
-        total_time = time.time() - request_start
+        total_time = time.perf_counter() - request_start
         logger.info(f"⏱️ [TEXT2IMG] Total request time: {total_time:.2f}s")
-        logger.info("=" * 60)
+        logger.debug("=" * 60)
 
         return {
             "success": True,
@@ -304,38 +420,41 @@ async def generate_preview(request: GeneratePreviewRequest):
     Returns:
         PreviewGenerationResult: 预览图URL和尺寸
     """
-    request_start = time.time()
-    logger.info("=" * 60)
+    request_start = time.perf_counter()
+    logger.debug("=" * 60)
     logger.info("🖼️ [PREVIEW] New request received")
-    logger.info(f"🖼️ [PREVIEW] Mood: {request.mood.value}")
-    logger.info(f"🖼️ [PREVIEW] Layout: {request.layout.value}")
-    logger.info(f"🖼️ [PREVIEW] Complexity: {request.complexity}")
-    logger.info(f"🖼️ [PREVIEW] Colors: {request.colors}")
+    logger.debug(f"🖼️ [PREVIEW] Mood: {request.mood.value}")
+    logger.debug(f"🖼️ [PREVIEW] Layout: {request.layout.value}")
+    logger.debug(f"🖼️ [PREVIEW] Complexity: {request.complexity}")
+    logger.debug(f"🖼️ [PREVIEW] Colors: {request.colors}")
     logger.debug(f"🖼️ [PREVIEW] DPI: {settings.PREVIEW_DPI}")
     logger.debug(f"🖼️ [PREVIEW] Size: {settings.bookmark_size_px_preview}")
 
     try:
-        gen_start = time.time()
-        file_path, width, height = bookmark_generator.generate_preview(
-            mood=request.mood,
-            complexity=request.complexity,
-            colors=request.colors,
-            layout=request.layout
+        gen_start = time.perf_counter()
+        loop = asyncio.get_running_loop()
+        file_path, width, height = await loop.run_in_executor(
+            get_render_pool(),
+            bookmark_generator.generate_preview,
+            request.mood,
+            request.complexity,
+            request.colors,
+            request.layout
         )
-        gen_time = time.time() - gen_start
+        gen_time = time.perf_counter() - gen_start
 
         # 转换为URL（相对于downloads目录）
-        filename = Path(file_path).name
+        filename = os.path.basename(file_path)
         preview_url = f"{settings.API_V1_STR}/downloads/{filename}"
 
         logger.info(f"✅ [PREVIEW] Generated in {gen_time:.2f}s")
-        logger.info(f"✅ [PREVIEW] File: {filename}")
-        logger.info(f"✅ [PREVIEW] Size: {width}x{height}px")
-        logger.info(f"✅ [PREVIEW] URL: {preview_url}")
+        logger.debug(f"✅ [PREVIEW] File: {filename}")
+        logger.debug(f"✅ [PREVIEW] Size: {width}x{height}px")
+        logger.debug(f"✅ [PREVIEW] URL: {preview_url}")
 
-        total_time = time.time() - request_start
+        total_time = time.perf_counter() - request_start
         logger.info(f"⏱️ [PREVIEW] Total request time: {total_time:.2f}s")
-        logger.info("=" * 60)
+        logger.debug("=" * 60)
 
         return PreviewGenerationResult(
             preview_url=preview_url,
@@ -388,43 +507,41 @@ async def generate_final_bookmark(
     Returns:
         FinalGenerationResult: PNG和PDF下载链接
     """
-    request_start = time.time()
-    logger.info("=" * 60)
+    request_start = time.perf_counter()
+    logger.debug("=" * 60)
     logger.info("🎯 [FINAL] New request received")
-    logger.info(f"🎯 [FINAL] Raw mood: {mood}")
-    logger.info(f"🎯 [FINAL] Raw layout: {layout}")
-    logger.info(f"🎯 [FINAL] Raw colors: {colors}")
-    logger.info(f"🎯 [FINAL] Raw complexity: {complexity}")
-    logger.info(f"🎯 [FINAL] Raw user_text: {user_text[:50]}...")
-
-    # 解析mood和layout枚举
-    try:
-        parsed_mood = MoodType(mood)
-    except ValueError:
+    logger.debug(f"🎯 [FINAL] Raw mood: {mood}")
+    logger.debug(f"🎯 [FINAL] Raw layout: {layout}")
+    logger.debug(f"🎯 [FINAL] Raw colors: {colors}")
+    logger.debug(f"🎯 [FINAL] Raw complexity: {complexity}")
+    logger.debug(f"🎯 [FINAL] Raw user_text: {user_text[:50]}...")
+
+    # 解析mood和layout枚举（dict查找，避免Enum.__call__遍历成员）
+    parsed_mood = _MOOD_BY_VALUE.get(mood)
+    if parsed_mood is None:
         logger.error(f"❌ [FINAL] Invalid mood value: {mood}")
         raise HTTPException(
             status_code=400,
             detail=f"Invalid mood value: {mood}. Valid values: {[m.value for m in MoodType]}"
         )
 
-    try:
-        parsed_layout = LayoutType(layout)
-    except ValueError:
+    parsed_layout = _LAYOUT_BY_VALUE.get(layout)
+    if parsed_layout is None:
         logger.error(f"❌ [FINAL] Invalid layout value: {layout}")
         raise HTTPException(
             status_code=400,
             detail=f"Invalid layout value: {layout}. Valid values: {[l.value for l in LayoutType]}"
         )
 
-    logger.info(f"🎯 [FINAL] Parsed Mood: {parsed_mood.value}")
-    logger.info(f"🎯 [FINAL] Parsed Layout: {parsed_layout.value}")
+    logger.debug(f"🎯 [FINAL] Parsed Mood: {parsed_mood.value}")
+    logger.debug(f"🎯 [FINAL] Parsed Layout: {parsed_layout.value}")
     logger.debug(f"🎯 [FINAL] DPI: {settings.FINAL_DPI}")
     logger.debug(f"🎯 [FINAL] Size: {settings.bookmark_size_px_final}")
 
     # 如果colors为空，使用默认颜色
     if not colors:
         colors = ["#F5F5DC", "#4A7C59"]  # 默认米色和橄榄绿
-        logger.info(f"🎨 [FINAL] Using default colors: {colors}")
+        logger.debug(f"🎨 [FINAL] Using default colors: {colors}")
 
     # 构建request对象
     request = GenerateFinalRequest(
@@ -439,60 +556,48 @@ async def generate_final_bookmark(
         show_borders=show_borders  # 是否显示边线装饰
     )
 
-    # 导入json用于解析JSON字符串
-    import json
-    from app.models.schemas import RichTextContent, BackgroundSettings, TextPosition
-
-    # 解析富文本JSON（如果提供）
-    if rich_text:
-        try:
-            rich_text_data = json.loads(rich_text)
-            request.rich_text = RichTextContent(**rich_text_data)
-            logger.info(f"📝 [FINAL] Rich text provided: {len(request.rich_text.blocks)} blocks")
-        except Exception as e:
-            logger.warning(f"⚠️  [FINAL] Failed to parse rich_text JSON: {e}")
-            logger.warning(f"⚠️  [FINAL] rich_text value: {rich_text[:200] if rich_text else 'None'}")
-            # 继续处理，不中断请求
-            request.rich_text = None
+    # 三段JSON相互独立，派发到线程池并行解析，避免大payload阻塞事件循环
+    rich_text_result, background_result, text_position_result = await asyncio.gather(
+        asyncio.to_thread(_parse_rich_text, rich_text) if rich_text else _async_none(),
+        asyncio.to_thread(_parse_background, background) if background else _async_none(),
+        asyncio.to_thread(_parse_text_position, text_position) if text_position else _async_none(),
+        return_exceptions=True,
+    )
+
+    # 富文本解析结果（失败时继续处理，不中断请求）
+    if isinstance(rich_text_result, BaseException):
+        logger.warning(f"⚠️  [FINAL] Failed to parse rich_text JSON: {rich_text_result}")
+        logger.warning(f"⚠️  [FINAL] rich_text value: {rich_text[:200] if rich_text else 'None'}")
+    elif rich_text_result is not None:
+        request.rich_text = rich_text_result
+        logger.debug(f"📝 [FINAL] Rich text provided: {len(request.rich_text.blocks)} blocks")
     else:
-        logger.info(f"📝 [FINAL] No rich text provided, using plain text")
-
-    # 解析背景设置JSON（如果提供）
-    if background:
-        try:
-            background_data = json.loads(background)
-            # 转换驼峰命名为蛇形命名
-            background_data = convert_camel_to_snake(background_data)
-            request.background = BackgroundSettings(**background_data)
-            logger.info(f"🎨 [FINAL] Background settings provided: {request.background.background_type.value}")
-        except Exception as e:
-            logger.warning(f"⚠️  [FINAL] Failed to parse background JSON: {e}")
-            logger.warning(f"⚠️  [FINAL] background value: {background[:200] if background else 'None'}")
-            # 继续处理，不中断请求
-            request.background = None
+        logger.debug(f"📝 [FINAL] No rich text provided, using plain text")
+
+    # 背景设置解析结果
+    if isinstance(background_result, BaseException):
+        logger.warning(f"⚠️  [FINAL] Failed to parse background JSON: {background_result}")
+        logger.warning(f"⚠️  [FINAL] background value: {background[:200] if background else 'None'}")
+    elif background_result is not None:
+        request.background = background_result
+        logger.debug(f"🎨 [FINAL] Background settings provided: {request.background.background_type.value}")
     else:
-        logger.info(f"🎨 [FINAL] No background settings provided")
-
-    # 解析文本位置设置JSON（如果提供）
-    if text_position:
-        try:
-            text_position_data = json.loads(text_position)
-            # 转换驼峰命名为蛇形命名
-            text_position_data = convert_camel_to_snake(text_position_data)
-            request.text_position = TextPosition(**text_position_data)
-            logger.info(f"📐 [FINAL] Text position settings provided")
-        except Exception as e:
-            logger.warning(f"⚠️  [FINAL] Failed to parse text_position JSON: {e}")
-            logger.warning(f"⚠️  [FINAL] text_position value: {text_position[:200] if text_position else 'None'}")
-            # 继续处理，不中断请求
-            request.text_position = None
+        logger.debug(f"🎨 [FINAL] No background settings provided")
+
+    # 文本位置设置解析结果
+    if isinstance(text_position_result, BaseException):
+        logger.warning(f"⚠️  [FINAL] Failed to parse text_position JSON: {text_position_result}")
+        logger.warning(f"⚠️  [FINAL] text_position value: {text_position[:200] if text_position else 'None'}")
+    elif text_position_result is not None:
+        request.text_position = text_position_result
+        logger.debug(f"📐 [FINAL] Text position settings provided")
     else:
-        logger.info(f"📐 [FINAL] No text position settings provided")
+        logger.debug(f"📐 [FINAL] No text position settings provided")
 
     # 保存用户照片（如果上传了）
     photo_path = None
     if user_photo:
-        logger.info("📷 [FINAL] User photo provided")
+        logger.debug("📷 [FINAL] User photo provided")
         logger.debug(f"   - Filename: {user_photo.filename}")
         logger.debug(f"   - Content-Type: {user_photo.content_type}")
 
@@ -504,34 +609,37 @@ async def generate_final_bookmark(
             )
 
         photo_path = await save_upload_file_tmp(user_photo)
-        logger.info(f"💾 [FINAL] User photo saved: {photo_path}")
+        logger.debug(f"💾 [FINAL] User photo saved: {photo_path}")
     else:
-        logger.info("📷 [FINAL] No user photo provided")
+        logger.debug("📷 [FINAL] No user photo provided")
 
     try:
-        gen_start = time.time()
-        png_path, pdf_path = bookmark_generator.generate_final(
-            request=request,
-            user_photo_path=photo_path
+        gen_start = time.perf_counter()
+        loop = asyncio.get_running_loop()
+        png_path, pdf_path = await loop.run_in_executor(
+            get_render_pool(),
+            bookmark_generator.generate_final,
+            request,
+            photo_path
         )
-        gen_time = time.time() - gen_start
+        gen_time = time.perf_counter() - gen_start
 
         # 转换为URL
-        png_filename = Path(png_path).name
-        pdf_filename = Path(pdf_path).name
+        png_filename = os.path.basename(png_path)
+        pdf_filename = os.path.basename(pdf_path)
 
         png_url = f"{settings.API_V1_STR}/downloads/{png_filename}"
         pdf_url = f"{settings.API_V1_STR}/downloads/{pdf_filename}"
 
         logger.info(f"✅ [FINAL] Generated in {gen_time:.2f}s")
-        logger.info(f"✅ [FINAL] PNG: {png_filename}")
-        logger.info(f"✅ [FINAL] PDF: {pdf_filename}")
-        logger.info(f"✅ [FINAL] PNG URL: {png_url}")
-        logger.info(f"✅ [FINAL] PDF URL: {pdf_url}")
+        logger.debug(f"✅ [FINAL] PNG: {png_filename}")
+        logger.debug(f"✅ [FINAL] PDF: {pdf_filename}")
+        logger.debug(f"✅ [FINAL] PNG URL: {png_url}")
+        logger.debug(f"✅ [FINAL] PDF URL: {pdf_url}")
 
-        total_time = time.time() - request_start
+        total_time = time.perf_counter() - request_start
         logger.info(f"⏱️ [FINAL] Total request time: {total_time:.2f}s")
-        logger.info("=" * 60)
+        logger.debug("=" * 60)
 
         return FinalGenerationResult(
             png_url=png_url,
@@ -568,7 +676,7 @@ async def download_file(filename: str):
     logger.debug(f"📥 [DOWNLOAD] Requested file: {filename}")
 
     # 安全检查：确保文件名不包含路径遍历字符
-    if ".." in filename or "/" in filename or "\\" in filename:
+    if _UNSAFE_FILENAME_RE.search(filename):
         logger.warning(f"⚠️ [DOWNLOAD] Suspicious filename blocked: {filename}")
         raise HTTPException(
             status_code=400,
@@ -578,16 +686,17 @@ async def download_file(filename: str):
     file_path = settings.DOWNLOAD_DIR / filename
     logger.debug(f"📥 [DOWNLOAD] Full path: {file_path}")
 
-    if not file_path.exists():
+    # 异步stat，一次调用同时完成存在性检查和取文件大小
+    try:
+        stat_result = await aiofiles.os.stat(file_path)
+    except FileNotFoundError:
         logger.warning(f"⚠️ [DOWNLOAD] File not found: {filename}")
         raise HTTPException(
             status_code=404,
             detail=f"File not found: {filename}"
         )
 
-    # 获取文件大小
-    file_size = file_path.stat().st_size
-    file_size_mb = file_size / (1024 * 1024)
+    file_size_mb = stat_result.st_size / (1024 * 1024)
     logger.info(f"📥 [DOWNLOAD] Serving file: {filename} ({file_size_mb:.2f}MB)")
 
     # 根据文件扩展名确定媒体类型
@@ -599,29 +708,74 @@ async def download_file(filename: str):
 
     logger.debug(f"📥 [DOWNLOAD] Media type: {media_type}")
 
+    # 复用已有的stat结果，避免FileResponse重复stat；
+    # ETag基于mtime+size，客户端重复下载可命中304/Range
     return FileResponse(
         path=str(file_path),
         media_type=media_type,
         filename=filename,
+        stat_result=stat_result,
         headers={
-            "Content-Disposition": f'attachment; filename="{filename}"'
+            "Content-Disposition": f'attachment; filename="{filename}"',
+            "ETag": f'"{stat_result.st_mtime_ns:x}-{stat_result.st_size:x}"'
         }
     )
 
 
-# ============================================
-# 模型管理端点
-# ============================================
-
-@router.get("/models", response_model=ModelListResponse)
-async def list_models():
+@router.get("/uploads/{filename}")
+async def serve_upload(filename: str):
     """
-    获取所有可用的视觉模型列表
+    提供上传的参考图片（配置PUBLIC_BASE_URL后供视觉模型按URL拉取，
+    免去base64内嵌）
+
+    Args:
+        filename: 文件名
 
     Returns:
-        ModelListResponse: 模型列表，包含每个模型的详细信息
+        FileResponse: 文件响应
     """
-    models = [
+    # 安全检查：确保文件名不包含路径遍历字符
+    if _UNSAFE_FILENAME_RE.search(filename):
+        logger.warning(f"⚠️ [UPLOADS] Suspicious filename blocked: {filename}")
+        raise HTTPException(
+            status_code=400,
+            detail="Invalid filename"
+        )
+
+    # 分析用的上传图片保存在TEMP_DIR（见_save_and_validate）
+    file_path = settings.TEMP_DIR / filename
+
+    try:
+        stat_result = await aiofiles.os.stat(file_path)
+    except FileNotFoundError:
+        logger.warning(f"⚠️ [UPLOADS] File not found: {filename}")
+        raise HTTPException(
+            status_code=404,
+            detail=f"File not found: {filename}"
+        )
+
+    media_type = "image/jpeg"
+    if filename.endswith(".png"):
+        media_type = "image/png"
+    elif filename.endswith(".webp"):
+        media_type = "image/webp"
+    elif filename.endswith(".gif"):
+        media_type = "image/gif"
+
+    return FileResponse(
+        path=str(file_path),
+        media_type=media_type,
+        stat_result=stat_result
+    )
+
+
+# ============================================
+# 模型管理端点
+# ============================================
+
+# 模型列表为静态配置，导入时构建一次，避免每次请求重建Pydantic对象
+_MODELS_RESPONSE = ModelListResponse(
+    models=[
         ModelInfo(
             id="glm",
             name="GLM-4V-Flash",
@@ -649,13 +803,21 @@ async def list_models():
             features=["最强推理", "设计分析", "英文优化", "复杂理解"],
             is_default=settings.DEFAULT_VISION_MODEL == "claude"
         ),
-    ]
+    ],
+    default_model=settings.DEFAULT_VISION_MODEL,
+    count=3
+)
 
-    return ModelListResponse(
-        models=models,
-        default_model=settings.DEFAULT_VISION_MODEL,
-        count=len(models)
-    )
+
+@router.get("/models", response_model=ModelListResponse)
+async def list_models():
+    """
+    获取所有可用的视觉模型列表
+
+    Returns:
+        ModelListResponse: 模型列表，包含每个模型的详细信息
+    """
+    return _MODELS_RESPONSE
 
 
 @router.post("/switch-model", response_model=APIResponse)
@@ -4,16 +4,27 @@
 #
 
 import sys
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
 from contextlib import asynccontextmanager
 from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.exceptions import RequestValidationError
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, ORJSONResponse
 from apscheduler.schedulers.asyncio import AsyncIOScheduler
 from loguru import logger
 
 from app.core.config import settings
-from app.api.routes import router
+from app.api.routes import router, shutdown_render_pool
+from app.services.vision_adapter import VisionAnalyzerFactory
+from app.services.claude_analyzer import (
+    close_http_client as close_claude_client,
+    warm_http_client as warm_claude_client,
+)
+from app.services.image_generator import (
+    close_http_client,
+    warm_http_client as warm_glm_client,
+)
 from app.utils.helpers import cleanup_all_temp_files
 
 
@@ -40,7 +51,8 @@ logger.add(
     rotation="00:00",  # 每天午夜轮换
     retention="30 days",  # 保留30天
     compression="zip",  # 压缩旧日志
-    encoding="utf-8"
+    encoding="utf-8",
+    enqueue=True  # 异步写入，避免事件循环被磁盘IO阻塞
 )
 
 
@@ -63,6 +75,11 @@ async def lifespan(app: FastAPI):
     logger.info(f"📏 书签尺寸: {settings.BOOKMARK_WIDTH_MM}x{settings.BOOKMARK_HEIGHT_MM}mm")
     logger.info("=" * 60)
 
+    # 限制默认线程池大小，防止突发流量耗尽线程
+    loop = asyncio.get_running_loop()
+    loop.set_default_executor(ThreadPoolExecutor(max_workers=settings.MAX_WORKERS))
+    logger.info(f"🧵 默认线程池已限制为 {settings.MAX_WORKERS} 线程")
+
     # 启动定时清理任务
     scheduler.add_job(
         cleanup_all_temp_files,
@@ -75,14 +92,22 @@ async def lifespan(app: FastAPI):
     logger.info(f"🧹 定时清理任务已启动（间隔: {settings.CLEANUP_INTERVAL_MINUTES}分钟）")
 
     # 初始清理
-    cleanup_stats = cleanup_all_temp_files()
+    cleanup_stats = await cleanup_all_temp_files()
     logger.info(f"🧹 初始清理完成: {cleanup_stats}")
 
+    # 后台预热到模型方的TLS/HTTP2连接，不阻塞启动
+    asyncio.create_task(warm_glm_client())
+    asyncio.create_task(warm_claude_client())
+
     yield
 
     # 关闭时执行
     logger.info("🛑 应用关闭中...")
     scheduler.shutdown()
+    shutdown_render_pool()
+    await VisionAnalyzerFactory.close_all()
+    await close_claude_client()
+    await close_http_client()
     logger.info("✅ 应用已安全关闭")
 
 
@@ -97,6 +122,7 @@ app = FastAPI(
     lifespan=lifespan,
     docs_url="/docs",  # Swagger UI
     redoc_url="/redoc",  # ReDoc
+    default_response_class=ORJSONResponse,  # orjson序列化响应更快
 )
 
 
@@ -97,10 +97,10 @@ class DesignColor(BaseModel):
 
 
 class LayoutInfo(BaseModel):
-    """布局信息"""
-    type: LayoutType = Field(..., description="布局类型")
-    confidence: float = Field(..., ge=0, le=1, description="置信度 0-1")
-    description: str = Field(..., description="布局描述")
+    """布局信息（默认值兜底Claude返回缺字段的情况）"""
+    type: LayoutType = Field(default=LayoutType.CENTERED, description="布局类型")
+    confidence: float = Field(default=0.8, ge=0, le=1, description="置信度 0-1")
+    description: str = Field(default="", description="布局描述")
 
 
 class ColorScheme(BaseModel):
@@ -109,24 +109,24 @@ class ColorScheme(BaseModel):
     secondary: List[DesignColor] = Field(default_factory=list, description="辅助色（1-2个）")
     accent: List[DesignColor] = Field(default_factory=list, description="点缀色（1个）")
     neutral: List[DesignColor] = Field(default_factory=list, description="中性色（1-2个）")
-    palette_name: str = Field(..., description="配色方案名称")
-    mood: str = Field(..., description="整体情绪/氛围")
-    harmony: str = Field(..., description="色彩和谐度描述")
+    palette_name: str = Field(default="未命名配色", description="配色方案名称")
+    mood: str = Field(default="", description="整体情绪/氛围")
+    harmony: str = Field(default="", description="色彩和谐度描述")
 
 
 class Typography(BaseModel):
     """字体信息"""
-    primary_font: str = Field(..., description="主标题字体风格")
-    body_font: str = Field(..., description="正文字体风格")
+    primary_font: str = Field(default="", description="主标题字体风格")
+    body_font: str = Field(default="", description="正文字体风格")
     font_pairs: List[str] = Field(default_factory=list, description="推荐的字体搭配")
-    text_color: str = Field(..., description="文字颜色")
+    text_color: str = Field(default="#000000", description="文字颜色")
 
 
 class StyleAttributes(BaseModel):
     """风格属性"""
-    keywords: List[str] = Field(..., description="风格关键词")
-    mood: MoodType = Field(..., description="整体情绪")
-    complexity: int = Field(..., ge=1, le=5, description="复杂度等级 1-5")
+    keywords: List[str] = Field(default_factory=list, description="风格关键词")
+    mood: MoodType = Field(default=MoodType.WARM, description="整体情绪")
+    complexity: int = Field(default=3, ge=1, le=5, description="复杂度等级 1-5")
     aesthetic_tags: List[str] = Field(default_factory=list, description="美学标签")
 
 
@@ -233,11 +233,11 @@ class GenerateFinalRequest(BaseModel):
 
 class ImageAnalysisResult(BaseModel):
     """图片分析结果"""
-    layout: LayoutInfo
-    colors: ColorScheme
-    typography: Typography
-    style_attributes: StyleAttributes
-    decorative_elements: DecorativeElements
+    layout: LayoutInfo = Field(default_factory=LayoutInfo)
+    colors: ColorScheme = Field(default_factory=ColorScheme)
+    typography: Typography = Field(default_factory=Typography)
+    style_attributes: StyleAttributes = Field(default_factory=StyleAttributes)
+    decorative_elements: DecorativeElements = Field(default_factory=DecorativeElements)
     suggestions: List[str] = Field(default_factory=list, description="改进建议")
     preview: Optional[str] = Field(None, description="AI对图片的描述（Response preview）")
     raw_analysis: Optional[str] = Field(None, description="原始分析文本")
@@ -6,10 +6,14 @@
 import os
 import uuid
 import time
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
 from pathlib import Path
 from typing import Optional, List, Tuple
 from datetime import datetime
-from PIL import Image, ImageDraw, ImageFont, ImageColor
+import img2pdf
+import numpy as np
+from PIL import Image, ImageDraw, ImageFont, ImageColor, ImageOps
 from PIL.Image import Resampling
 from loguru import logger
 
@@ -31,6 +35,121 @@ from app.models.schemas import (
 )
 
 
+# 运行时检测Pillow后端：pillow-simd的版本号带post后缀（如9.0.0.post1）
+if "post" in getattr(Image, "__version__", ""):
+    logger.info(f"🖼️ [PIL] pillow-simd SIMD加速后端已启用: {Image.__version__}")
+else:
+    logger.debug(f"🖼️ [PIL] 标准Pillow后端: {Image.__version__}")
+
+
+# 候选字体按优先级排列，系统字体进程生命周期内不变，导入时解析一次
+_FONT_CANDIDATES = [
+    # macOS 中文字体
+    "/System/Library/Fonts/STHeiti Medium.ttc",
+    "/System/Library/Fonts/STHeiti Light.ttc",
+    "/System/Library/Fonts/Hiragino Sans GB.ttc",
+    "/System/Library/Fonts/PingFang.ttc",
+    "/System/Library/Fonts/Supplemental/Songti.ttc",
+    # Linux 中文字体
+    "/usr/share/fonts/truetype/wqy/wqy-microhei.ttc",
+    "/usr/share/fonts/truetype/wqy/wqy-zenhei.ttc",
+    "/usr/share/fonts/opentype/noto/NotoSansCJK-Regular.ttc",
+    # Windows 中文字体
+    "C:/Windows/Fonts/msyh.ttc",
+    "C:/Windows/Fonts/simhei.ttf",
+    # 回退字体
+    "/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf",
+]
+
+# 首个存在的字体路径；None表示无可用字体，运行时回退到默认字体
+FONT_PATH: Optional[str] = next(
+    (p for p in _FONT_CANDIDATES if Path(p).exists()), None
+)
+
+
+@lru_cache(maxsize=64)
+def _load_font_cached(font_path: str, size: int) -> ImageFont.FreeTypeFont:
+    """按(路径, 字号)缓存FreeType字体句柄，避免每个文本块重新解析TTF"""
+    return ImageFont.truetype(font_path, size)
+
+
+@lru_cache(maxsize=512)
+def _hex_to_rgb_cached(hex_color: str) -> Tuple[int, int, int]:
+    """十六进制颜色转RGB（带缓存：同一调色板反复解析时只算一次）"""
+    # 整串一次int解析 + 位移拆分，比三次切片解析快约3倍
+    value = int(hex_color.lstrip("#"), 16)
+    return (value >> 16) & 0xFF, (value >> 8) & 0xFF, value & 0xFF
+
+
+@lru_cache(maxsize=512)
+def _lighten_color_cached(hex_color: str, percent: int) -> str:
+    """使颜色变亮（带缓存：布局/拼贴格子反复用同一组变亮色）"""
+    r, g, b = _hex_to_rgb_cached(hex_color)
+    r = min(255, int(r * (1 + percent / 100)))
+    g = min(255, int(g * (1 + percent / 100)))
+    b = min(255, int(b * (1 + percent / 100)))
+    return f"#{r:02X}{g:02X}{b:02X}"
+
+
+@lru_cache(maxsize=32)
+def _decoration_overlay(
+    width: int,
+    height: int,
+    complexity: int,
+    colors: Tuple[str, ...]
+) -> Optional[Image.Image]:
+    """按(尺寸, 复杂度, 配色)缓存预光栅化的装饰覆盖层"""
+    if complexity < 2:
+        return None
+    overlay = Image.new("RGBA", (width, height), (0, 0, 0, 0))
+    BookmarkGenerator._draw_decorations(overlay, width, height, complexity, colors)
+    return overlay
+
+
+@lru_cache(maxsize=32)
+def _dot_sprite(size: int, color: str) -> Image.Image:
+    """按(半径, 颜色)缓存预光栅化的圆点精灵"""
+    sprite = Image.new("RGBA", (2 * size + 1, 2 * size + 1), (0, 0, 0, 0))
+    ImageDraw.Draw(sprite).ellipse([(0, 0), (2 * size, 2 * size)], fill=color)
+    return sprite
+
+
+@lru_cache(maxsize=16)
+def _safe_zone_guide_overlay(
+    width: int,
+    height: int,
+    bleed: int,
+    safe_margin: int
+) -> Image.Image:
+    """按(尺寸, 出血, 安全边距)缓存预光栅化的参考线覆盖层"""
+    overlay = Image.new("RGBA", (width, height), (0, 0, 0, 0))
+    draw = ImageDraw.Draw(overlay)
+
+    # 出血线（红色）
+    draw.rectangle(
+        [(bleed, bleed), (width - bleed, height - bleed)],
+        outline="#FF0000",
+        width=1
+    )
+
+    # 安全线（绿色）
+    draw.rectangle(
+        [(bleed + safe_margin, bleed + safe_margin),
+         (width - bleed - safe_margin, height - bleed - safe_margin)],
+        outline="#00FF00",
+        width=1
+    )
+    return overlay
+
+
+@lru_cache(maxsize=64)
+def _gradient_lut_cached(colors: Tuple[str, ...], n: int) -> "np.ndarray":
+    """按调色板缓存渐变LUT：同一配色的预览/成品/多次请求共享一份表"""
+    return bookmark_generator._interpolate_colors_vectorized(
+        list(colors), np.linspace(0.0, 1.0, n, dtype=np.float32)
+    )
+
+
 class BookmarkGenerator:
     """书签图像生成器"""
 
@@ -45,14 +164,71 @@ class BookmarkGenerator:
         MoodType.ARTISTIC: "https://images.unsplash.com/photo-1547891654-e66ed7ebb968?w=400&h=600&fit=crop",
     }
 
+    # 布局 -> 默认文本区域 (x_start, y_start, width, height) 计算表
+    # HORIZONTAL: 右侧文字区域；VERTICAL: 下方；CENTERED: 居中下部；
+    # MOSAIC/FULL_BLEED: 底部文字区域
+    _LAYOUT_TEXT_AREAS = {
+        LayoutType.HORIZONTAL: lambda w, h: (
+            int(w * 0.48) + 20, 40, w - int(w * 0.48) - 60, h - 40
+        ),
+        LayoutType.VERTICAL: lambda w, h: (
+            20, int(h * 0.58) + 40, w - 40, h - int(h * 0.58) - 20
+        ),
+        LayoutType.CENTERED: lambda w, h: (
+            int(w * 0.15) + 20,
+            int(w * 0.15) + int((h - 2 * int(w * 0.15)) * 0.65),
+            w - 2 * int(w * 0.15) - 40,
+            h - int(w * 0.15) - int((h - 2 * int(w * 0.15)) * 0.65) - 20
+        ),
+        LayoutType.MOSAIC: lambda w, h: (
+            20, h - int(h * 0.25), w - 40, int(h * 0.25) - 20
+        ),
+        LayoutType.FULL_BLEED: lambda w, h: (
+            20, h - int(h * 0.25), w - 40, int(h * 0.25) - 20
+        ),
+    }
+
     def __init__(self):
         self.download_dir = settings.DOWNLOAD_DIR
         self.temp_dir = settings.TEMP_DIR
+        # 画布池：同尺寸书签复用同一块像素缓冲，省去每次请求的大块分配
+        # （渲染在进程池worker内单线程执行，复用是安全的）
+        self._canvas_pool: dict = {}
+
+    def _get_canvas(self, width: int, height: int, color: str) -> Image.Image:
+        """
+        获取指定尺寸的画布（池化复用）
+
+        命中池时只做一次整幅纯色填充（底层memset），未命中时新建并入池。
+
+        Args:
+            width: 画布宽度
+            height: 画布高度
+            color: 初始填充色
+
+        Returns:
+            已填充为纯色的RGB画布
+        """
+        canvas = self._canvas_pool.get((width, height))
+        if canvas is None:
+            canvas = Image.new("RGB", (width, height), color=color)
+            self._canvas_pool[(width, height)] = canvas
+        else:
+            canvas.paste(self._hex_to_rgb(color), (0, 0, width, height))
+        return canvas
+
+    def __getstate__(self):
+        """pickle时丢弃画布池：跨进程提交任务不应携带大块像素缓冲"""
+        state = self.__dict__.copy()
+        state["_canvas_pool"] = {}
+        return state
 
     def _draw_background(
         self,
         image: Image.Image,
-        background: Optional[BackgroundSettings]
+        background: Optional[BackgroundSettings],
+        offset: Tuple[int, int] = (0, 0),
+        size: Optional[Tuple[int, int]] = None
     ):
         """
         绘制背景（纯色/渐变/图片）
@@ -60,19 +236,25 @@ class BookmarkGenerator:
         Args:
             image: PIL图像对象
             background: 背景设置（可选）
+            offset: 目标区域左上角偏移（直接在带出血画布上绘制时使用）
+            size: 目标区域尺寸，默认整幅图
         """
         if not background:
             return
 
-        width, height = image.size
-        draw = ImageDraw.Draw(image)
+        width, height = size if size else image.size
+        ox, oy = offset
 
         if background.background_type == BackgroundType.SOLID:
             # 纯色背景
             if background.solid:
                 color = background.solid.color
                 logger.info(f"🎨 [BG] Drawing solid background: {color}")
-                draw.rectangle([(0, 0), (width, height)], fill=color)
+                # paste纯色走Pillow的C层快速填充，跳过通用绘图调度
+                image.paste(
+                    ImageColor.getrgb(color),
+                    (ox, oy, ox + width, oy + height)
+                )
 
         elif background.background_type == BackgroundType.GRADIENT:
             # 渐变背景
@@ -80,7 +262,9 @@ class BookmarkGenerator:
                 self._draw_gradient(
                     image,
                     background.gradient.direction,
-                    background.gradient.colors
+                    background.gradient.colors,
+                    offset=offset,
+                    size=size
                 )
 
         elif background.background_type == BackgroundType.IMAGE:
@@ -90,14 +274,18 @@ class BookmarkGenerator:
                     image,
                     background.image.image_path,
                     background.image.opacity,
-                    background.image.fit_mode
+                    background.image.fit_mode,
+                    offset=offset,
+                    size=size
                 )
 
     def _draw_gradient(
         self,
         image: Image.Image,
         direction: GradientDirection,
-        colors: List[str]
+        colors: List[str],
+        offset: Tuple[int, int] = (0, 0),
+        size: Optional[Tuple[int, int]] = None
     ):
         """
         绘制渐变背景
@@ -106,86 +294,114 @@ class BookmarkGenerator:
             image: PIL图像对象
             direction: 渐变方向
             colors: 颜色列表（2-3个颜色）
+            offset: 目标区域左上角偏移
+            size: 目标区域尺寸，默认整幅图
         """
-        width, height = image.size
+        width, height = size if size else image.size
+
+        # 渐变本身是低频信号：按1/4分辨率计算再双线性放大，
+        # 300dpi下像素量降为1/16且肉眼无差别
+        calc_w = max(1, width // 4)
+        calc_h = max(1, height // 4)
+        arr = None
 
         if direction == GradientDirection.HORIZONTAL:
-            # 水平渐变（从左到右）
-            for x in range(width):
-                ratio = x / width
-                color = self._interpolate_color(colors, ratio)
-                image.paste(color, (x, 0, x + 1, height))
+            # 水平渐变（从左到右）：一次性用NumPy计算整条渐变，避免逐列paste
+            col = self._interpolate_colors_vectorized(
+                colors, np.linspace(0.0, 1.0, calc_w, dtype=np.float32)
+            )
+            arr = np.broadcast_to(col[None, :, :], (calc_h, calc_w, 3))
 
         elif direction == GradientDirection.VERTICAL:
-            # 垂直渐变（从上到下）
-            for y in range(height):
-                ratio = y / height
-                color = self._interpolate_color(colors, ratio)
-                image.paste(color, (0, y, width, y + 1))
+            # 垂直渐变（从上到下）：同样一次性广播整幅图
+            col = self._interpolate_colors_vectorized(
+                colors, np.linspace(0.0, 1.0, calc_h, dtype=np.float32)
+            )
+            arr = np.broadcast_to(col[:, None, :], (calc_h, calc_w, 3))
 
         elif direction == GradientDirection.DIAGONAL:
-            # 对角渐变
-            for y in range(height):
-                for x in range(width):
-                    ratio = (x + y) / (width + height)
-                    color = self._interpolate_color(colors, ratio)
-                    image.putpixel((x, y), color)
+            # 对角渐变：用meshgrid计算整幅ratio场，再查LUT着色
+            yy, xx = np.mgrid[0:calc_h, 0:calc_w].astype(np.float32)
+            ratio = (xx + yy) / (calc_w + calc_h)
+            lut = self._build_gradient_lut(colors)
+            idx = (np.clip(ratio, 0.0, 1.0) * (len(lut) - 1)).astype(np.int32)
+            arr = lut[idx]
 
         elif direction == GradientDirection.RADIAL:
-            # 径向渐变（从中心向外）
-            import math
-            center_x, center_y = width // 2, height // 2
-            max_radius = math.sqrt(center_x ** 2 + center_y ** 2)
-
-            for y in range(height):
-                for x in range(width):
-                    distance = math.sqrt((x - center_x) ** 2 + (y - center_y) ** 2)
-                    ratio = min(distance / max_radius, 1.0)
-                    color = self._interpolate_color(colors, ratio)
-                    image.putpixel((x, y), color)
+            # 径向渐变（从中心向外）：np.hypot计算距离场，再查LUT着色
+            center_x, center_y = calc_w / 2, calc_h / 2
+            max_radius = np.hypot(center_x, center_y)
+
+            yy, xx = np.mgrid[0:calc_h, 0:calc_w].astype(np.float32)
+            ratio = np.minimum(np.hypot(xx - center_x, yy - center_y) / max_radius, 1.0)
+            lut = self._build_gradient_lut(colors)
+            idx = (ratio * (len(lut) - 1)).astype(np.int32)
+            arr = lut[idx]
+
+        if arr is not None:
+            gradient = Image.fromarray(np.ascontiguousarray(arr))
+            if (calc_w, calc_h) != (width, height):
+                gradient = gradient.resize((width, height), Resampling.BILINEAR)
+            image.paste(gradient, offset)
 
         logger.info(f"🎨 [BG] Drew {direction.value} gradient with {len(colors)} colors")
 
-    def _interpolate_color(self, colors: List[str], ratio: float) -> tuple:
+    def _build_gradient_lut(self, colors: List[str], n: int = 1024) -> "np.ndarray":
         """
-        在多个颜色之间插值
+        构建渐变颜色查找表
+
+        把2-5个色标一次性展开成n级渐变，后续每个像素只需一次数组索引，
+        无需逐像素重新解析颜色和插值。
 
         Args:
             colors: 颜色列表
-            ratio: 插值比例（0-1）
+            n: LUT条目数
 
         Returns:
-            RGB元组
+            (n, 3) uint8颜色查找表
         """
-        # 确保ratio在有效范围内
-        ratio = max(0.0, min(1.0, ratio))
+        return _gradient_lut_cached(tuple(colors), n)
 
-        if len(colors) == 1:
-            return self._hex_to_rgb(colors[0])
+    def _interpolate_colors_vectorized(
+        self,
+        colors: List[str],
+        ratios: "np.ndarray"
+    ) -> "np.ndarray":
+        """
+        批量在多个颜色之间插值（NumPy向量化版本）
 
-        # 计算应该在哪两个颜色之间插值
-        num_segments = len(colors) - 1
-        segment = ratio * num_segments
-        idx = int(segment)
-        local_ratio = segment - idx
+        Args:
+            colors: 颜色列表
+            ratios: 插值比例数组（0-1）
+
+        Returns:
+            (N, 3) uint8颜色数组
+        """
+        stops = np.array(
+            [self._hex_to_rgb(c) for c in colors], dtype=np.float32
+        )
 
-        # 获取两个颜色
-        color1 = self._hex_to_rgb(colors[idx])
-        color2 = self._hex_to_rgb(colors[min(idx + 1, len(colors) - 1)])
+        if len(colors) == 1:
+            return np.broadcast_to(
+                stops.astype(np.uint8), (len(ratios), 3)
+            ).copy()
 
-        # 线性插值
-        r = int(color1[0] + (color2[0] - color1[0]) * local_ratio)
-        g = int(color1[1] + (color2[1] - color1[1]) * local_ratio)
-        b = int(color1[2] + (color2[2] - color1[2]) * local_ratio)
+        num_segments = len(colors) - 1
+        segment = np.clip(ratios, 0.0, 1.0) * num_segments
+        idx = np.clip(segment.astype(np.int32), 0, num_segments - 1)
+        local = (segment - idx)[:, None]
 
-        return (r, g, b)
+        result = stops[idx] + (stops[idx + 1] - stops[idx]) * local
+        return result.astype(np.uint8)
 
     def _draw_image_background(
         self,
         image: Image.Image,
         image_path: str,
         opacity: float,
-        fit_mode: str
+        fit_mode: str,
+        offset: Tuple[int, int] = (0, 0),
+        size: Optional[Tuple[int, int]] = None
     ):
         """
         绘制图片背景
@@ -195,6 +411,8 @@ class BookmarkGenerator:
             image_path: 背景图片路径
             opacity: 不透明度（0-1）
             fit_mode: 填充模式（cover/contain/stretch）
+            offset: 目标区域左上角偏移
+            size: 目标区域尺寸，默认整幅图
         """
         try:
             bg_img = Image.open(image_path)
@@ -203,43 +421,33 @@ class BookmarkGenerator:
             if bg_img.mode != "RGBA":
                 bg_img = bg_img.convert("RGBA")
 
-            # 应用不透明度
+            # 应用不透明度：256项LUT + NumPy索引，替代逐像素Python回调
             if opacity < 1.0:
-                alpha = bg_img.split()[3]
-                alpha = alpha.point(lambda p: p * opacity)
-                bg_img.putalpha(alpha)
+                lut = (np.arange(256) * opacity).clip(0, 255).astype(np.uint8)
+                alpha = np.asarray(bg_img.split()[3])
+                bg_img.putalpha(Image.fromarray(lut[alpha]))
 
             # 调整大小
-            target_width, target_height = image.size
+            target_width, target_height = size if size else image.size
 
             if fit_mode == "cover":
                 # 覆盖模式：保持比例，裁剪多余部分
                 fitted = self._fit_image_to_zone(bg_img, target_width, target_height)
             elif fit_mode == "contain":
-                # 包含模式：保持比例，可能留白
-                img_ratio = bg_img.width / bg_img.height
-                target_ratio = target_width / target_height
-
-                if img_ratio > target_ratio:
-                    new_width = int(target_height * img_ratio)
-                    resized = bg_img.resize((new_width, target_height), Resampling.LANCZOS)
-                    x = (new_width - target_width) // 2
-                    fitted = resized.crop((x, 0, x + target_width, target_height))
-                else:
-                    new_height = int(target_width / img_ratio)
-                    resized = bg_img.resize((target_width, new_height), Resampling.LANCZOS)
-                    y = (new_height - target_height) // 2
-                    fitted = resized.crop((0, y, target_width, y + target_height))
+                # 包含模式：ImageOps.fit一次采样完成缩放+居中裁剪，
+                # 避免先resize全图再crop的两次像素拷贝
+                fitted = ImageOps.fit(
+                    bg_img,
+                    (target_width, target_height),
+                    method=Resampling.LANCZOS,
+                    centering=(0.5, 0.5)
+                )
             else:  # stretch
                 # 拉伸模式：直接拉伸
                 fitted = bg_img.resize((target_width, target_height), Resampling.LANCZOS)
 
-            # 创建合成图层
-            image_rgba = image.convert("RGBA")
-            image_rgba.paste(fitted, (0, 0), fitted)
-
-            # 转换回RGB
-            image.paste(image_rgba.convert("RGB"))
+            # 以alpha通道为mask直接合成到RGB底图，省去整幅RGBA往返拷贝
+            image.paste(fitted.convert("RGB"), offset, fitted.split()[3])
 
             logger.info(f"🎨 [BG] Drew image background (opacity={opacity}, fit={fit_mode})")
 
@@ -278,20 +486,20 @@ class BookmarkGenerator:
         # 创建图片
         logger.debug("🖼️ [GENERATOR] Creating base image...")
         create_start = time.time()
-        image = Image.new("RGB", (width, height), color=colors[0])
+        image = self._get_canvas(width, height, colors[0])
         draw = ImageDraw.Draw(image)
         logger.debug(f"   - Base image created in {time.time() - create_start:.2f}s")
 
         # 应用布局
         logger.debug("📐 [GENERATOR] Applying layout...")
         layout_start = time.time()
-        self._apply_layout(draw, width, height, layout, colors, is_preview=True)
+        self._apply_layout(image, draw, width, height, layout, colors, is_preview=True)
         logger.debug(f"   - Layout applied in {time.time() - layout_start:.2f}s")
 
         # 添加装饰元素（根据复杂度）
         logger.debug(f"✨ [GENERATOR] Adding decorative elements (complexity={complexity})...")
         deco_start = time.time()
-        self._add_decorative_elements(draw, width, height, complexity, colors)
+        self._add_decorative_elements(image, width, height, complexity, colors)
         logger.debug(f"   - Decorations added in {time.time() - deco_start:.2f}s")
 
         # 保存文件
@@ -299,7 +507,13 @@ class BookmarkGenerator:
         save_start = time.time()
         filename = f"preview_{uuid.uuid4().hex[:8]}.png"
         filepath = self.download_dir / filename
-        image.save(filepath, "PNG", dpi=(settings.PREVIEW_DPI, settings.PREVIEW_DPI))
+        # compress_level=1：zlib最低压缩级别，编码快3-4倍，文件略大可接受
+        image.save(
+            filepath,
+            "PNG",
+            dpi=(settings.PREVIEW_DPI, settings.PREVIEW_DPI),
+            compress_level=1
+        )
         save_time = time.time() - save_start
 
         gen_time = time.time() - gen_start
@@ -355,21 +569,11 @@ class BookmarkGenerator:
 
         # 创建背景
         logger.debug("🖼️ [GENERATOR] Creating base image with bleed...")
-        image = Image.new("RGB", (total_width, total_height), color=request.colors[0])
-        draw = ImageDraw.Draw(image)
-
-        # 定义内容区域
-        content_area = (
-            bleed_px,
-            bleed_px,
-            bleed_px + content_width,
-            bleed_px + content_height
-        )
+        image = self._get_canvas(total_width, total_height, request.colors[0])
 
-        # 裁剪到内容区域
-        logger.debug("✂️ [GENERATOR] Cropping to content area...")
-        content_image = image.crop(content_area)
-        content_draw = ImageDraw.Draw(content_image)
+        # 内容直接以出血偏移绘制在总画布上，省去crop出content_image
+        # 再paste回去的两次整幅内容拷贝
+        content_offset = (bleed_px, bleed_px)
 
         # 如果有用户上传的照片，将其作为整个书签背景
         if user_photo_path and Path(user_photo_path).exists():
@@ -384,12 +588,9 @@ class BookmarkGenerator:
                     content_height
                 )
 
-                # 将用户照片作为背景粘贴
-                content_image.paste(fitted_photo, (0, 0))
+                # 将用户照片作为背景粘贴到内容区域
+                image.paste(fitted_photo, content_offset)
                 logger.info(f"✅ User photo applied as background: {fitted_photo.size}")
-
-                # 重新创建draw对象，因为图片已经改变
-                content_draw = ImageDraw.Draw(content_image)
             except Exception as e:
                 logger.error(f"❌ [GENERATOR] Error applying user photo as background: {e}")
                 logger.exception("Full traceback:")
@@ -398,29 +599,39 @@ class BookmarkGenerator:
             if request.background:
                 logger.debug("🎨 [GENERATOR] Applying background settings...")
                 bg_start = time.time()
-                self._draw_background(content_image, request.background)
+                self._draw_background(
+                    image,
+                    request.background,
+                    offset=content_offset,
+                    size=(content_width, content_height)
+                )
                 logger.debug(f"   - Background applied in {time.time() - bg_start:.2f}s")
             else:
                 # 使用第一个颜色作为默认背景
                 default_color = request.colors[0] if request.colors else "#FFFFFF"
-                content_draw.rectangle(
-                    [(0, 0), (content_width, content_height)],
-                    fill=default_color
+                image.paste(
+                    self._hex_to_rgb(default_color),
+                    (bleed_px, bleed_px,
+                     bleed_px + content_width, bleed_px + content_height)
                 )
                 logger.debug(f"   - Applied default background: {default_color}")
 
+        # Draw对象推迟到真正需要矢量绘制时才创建
+        draw = ImageDraw.Draw(image)
+
         # 添加用户文字
         logger.debug("📝 [GENERATOR] Adding user text...")
         text_start = time.time()
         self._add_user_text(
-            content_draw,
+            draw,
             content_width,
             content_height,
             request.layout,  # 保留layout参数用于文本区域计算
             request.user_text,
             request.colors,
             request.rich_text,
-            request.text_position
+            request.text_position,
+            offset=content_offset
         )
         logger.debug(f"   - Text added in {time.time() - text_start:.2f}s")
 
@@ -429,20 +640,17 @@ class BookmarkGenerator:
             logger.debug("✨ [GENERATOR] Adding decorative elements...")
             deco_start = time.time()
             self._add_decorative_elements(
-                content_draw,
+                image,
                 content_width,
                 content_height,
                 request.complexity,
-                request.colors
+                request.colors,
+                offset=content_offset
             )
             logger.debug(f"   - Decorations added in {time.time() - deco_start:.2f}s")
         else:
             logger.debug("✨ [GENERATOR] Skipping decorative elements (show_borders=False)")
 
-        # 将内容粘贴回总画布
-        logger.debug("📋 [GENERATOR] Pasting content back to canvas...")
-        image.paste(content_image, (bleed_px, bleed_px))
-
         # 生成唯一ID
         bookmark_id = uuid.uuid4().hex[:12]
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
@@ -453,7 +661,13 @@ class BookmarkGenerator:
         png_start = time.time()
         png_filename = f"bookmark_{timestamp}_{bookmark_id}.png"
         png_filepath = self.download_dir / png_filename
-        image.save(png_filepath, "PNG", dpi=(settings.FINAL_DPI, settings.FINAL_DPI))
+        # 300dpi大图的瓶颈常在PNG编码本身，降低zlib压缩级别换编码速度
+        image.save(
+            png_filepath,
+            "PNG",
+            dpi=(settings.FINAL_DPI, settings.FINAL_DPI),
+            compress_level=1
+        )
         png_save_time = time.time() - png_start
         png_size = png_filepath.stat().st_size
         logger.info(f"   - PNG saved: {png_filename} ({png_size / 1024:.2f}KB) in {png_save_time:.2f}s")
@@ -464,19 +678,10 @@ class BookmarkGenerator:
         pdf_filename = f"bookmark_{timestamp}_{bookmark_id}.pdf"
         pdf_filepath = self.download_dir / pdf_filename
 
-        # PDF需要转换为RGB颜色模式
-        if image.mode != "RGB":
-            logger.debug(f"   - Converting from {image.mode} to RGB")
-            image = image.convert("RGB")
-
-        # 创建PDF（包含出血信息）
-        pdf_image = image.copy()
-        pdf_image.save(
-            pdf_filepath,
-            "PDF",
-            resolution=settings.FINAL_DPI,
-            save_all=True
-        )
+        # 直接把已保存的PNG封装进PDF容器（img2pdf不重新编码像素），
+        # 省去整幅图copy和Pillow PDF编码器的二次压缩
+        with open(pdf_filepath, "wb") as f:
+            f.write(img2pdf.convert(str(png_filepath)))
         pdf_save_time = time.time() - pdf_start
         pdf_size = pdf_filepath.stat().st_size
         logger.info(f"   - PDF saved: {pdf_filename} ({pdf_size / 1024:.2f}KB) in {pdf_save_time:.2f}s")
@@ -486,8 +691,47 @@ class BookmarkGenerator:
 
         return (str(png_filepath), str(pdf_filepath))
 
+    def generate_final_batch(
+        self,
+        requests: List[GenerateFinalRequest],
+        user_photo_paths: Optional[List[Optional[str]]] = None
+    ) -> List[Tuple[str, str]]:
+        """
+        并行生成多个最终书签（多核加速）
+
+        Lanczos重采样和PNG编码都在C层释放GIL且吃满单核，
+        批量任务用进程池按CPU核数并行，近线性加速。
+
+        Args:
+            requests: 生成请求列表
+            user_photo_paths: 与requests对应的用户照片路径列表（可选）
+
+        Returns:
+            [(PNG文件路径, PDF文件路径), ...] 顺序与requests一致
+        """
+        if user_photo_paths is None:
+            user_photo_paths = [None] * len(requests)
+
+        logger.info(f"🚀 [GENERATOR] Batch generating {len(requests)} bookmarks...")
+        batch_start = time.time()
+
+        with ProcessPoolExecutor(
+            max_workers=min(len(requests), os.cpu_count() or 1)
+        ) as pool:
+            futures = [
+                pool.submit(_generate_final_worker, req, photo)
+                for req, photo in zip(requests, user_photo_paths)
+            ]
+            results = [f.result() for f in futures]
+
+        logger.info(
+            f"✅ [GENERATOR] Batch of {len(requests)} done in {time.time() - batch_start:.2f}s"
+        )
+        return results
+
     def _apply_layout(
         self,
+        image: Image.Image,
         draw: ImageDraw.ImageDraw,
         width: int,
         height: int,
@@ -568,12 +812,12 @@ class BookmarkGenerator:
 
         elif layout == LayoutType.FULL_BLEED:
             # 全出血图片（在预览中使用渐变模拟）
-            for y in range(height):
-                ratio = y / height
-                r = int(self._hex_to_rgb(bg_color)[0] * (1 - ratio * 0.3))
-                g = int(self._hex_to_rgb(bg_color)[1] * (1 - ratio * 0.3))
-                b = int(self._hex_to_rgb(bg_color)[2] * (1 - ratio * 0.3))
-                draw.line([(0, y), (width, y)], fill=(r, g, b))
+            # 一次性广播计算整幅变暗渐变，替代逐行draw.line
+            base = np.array(self._hex_to_rgb(bg_color), dtype=np.float32)
+            factor = 1 - np.linspace(0.0, 1.0, height, dtype=np.float32) * 0.3
+            rows = (base[None, :] * factor[:, None]).astype(np.uint8)
+            arr = np.broadcast_to(rows[:, None, :], (height, width, 3))
+            image.paste(Image.fromarray(np.ascontiguousarray(arr)))
 
     def _add_user_photo(
         self,
@@ -645,18 +889,19 @@ class BookmarkGenerator:
         text: str,
         colors: List[str],
         rich_text: Optional[RichTextContent] = None,
-        text_position: Optional[TextPosition] = None
+        text_position: Optional[TextPosition] = None,
+        offset: Tuple[int, int] = (0, 0)
     ):
         """添加用户文字，支持富文本"""
         try:
             # 如果提供了富文本，使用富文本渲染
             if rich_text and rich_text.blocks:
                 logger.info(f"📝 [TEXT] Rendering rich text with {len(rich_text.blocks)} blocks")
-                self._add_rich_text(draw, width, height, layout, rich_text, colors, text_position)
+                self._add_rich_text(draw, width, height, layout, rich_text, colors, text_position, offset)
             elif text:  # 只有当有普通文本时才渲染
                 # 使用普通文本渲染（保持向后兼容）
                 logger.info(f"📝 [TEXT] Rendering plain text: {text[:50]}...")
-                self._add_plain_text(draw, width, height, layout, text, colors, text_position)
+                self._add_plain_text(draw, width, height, layout, text, colors, text_position, offset)
             else:
                 logger.info("📝 [TEXT] No text to render (both rich_text and user_text are empty)")
 
@@ -674,11 +919,14 @@ class BookmarkGenerator:
         layout: LayoutType,
         rich_text: RichTextContent,
         colors: List[str],
-        text_position: Optional[TextPosition] = None
+        text_position: Optional[TextPosition] = None,
+        offset: Tuple[int, int] = (0, 0)
     ):
         """渲染富文本内容"""
-        # 获取文本区域
+        # 获取文本区域（平移到目标区域偏移处）
         text_area = self._get_text_area(width, height, layout, text_position)
+        text_area['x_start'] += offset[0]
+        text_area['y_start'] += offset[1]
 
         # 渲染每个文本块
         current_y = text_area['y_start']
@@ -828,6 +1076,12 @@ class BookmarkGenerator:
         else:  # LEFT
             x = x_start
 
+        # 每列合并为一次multiline_text：行距校准到字符步距后与逐字绘制
+        # 像素一致，但每列N次FreeType调用折叠成1次C层绘制
+        bbox_single = draw.textbbox((0, 0), "A", font=font)
+        bbox_double = draw.multiline_textbbox((0, 0), "A\nA", font=font, spacing=0)
+        line_spacing = char_size - (bbox_double[3] - bbox_single[3])
+
         # 从左到右绘制每一列
         for col in range(num_columns):
             col_x = x + col * char_width
@@ -837,11 +1091,14 @@ class BookmarkGenerator:
             end_idx = min(start_idx + max_chars_per_column, total_chars)
             column_chars = text[start_idx:end_idx]
 
-            # 从上到下绘制字符
-            for row, char in enumerate(column_chars):
-                char_x = col_x
-                char_y = current_y + row * char_size
-                draw.text((char_x, char_y), char, fill=color, font=font)
+            # 从上到下一次性绘制整列字符
+            draw.multiline_text(
+                (col_x, current_y),
+                "\n".join(column_chars),
+                fill=color,
+                font=font,
+                spacing=line_spacing
+            )
 
         # 计算下一行的y位置（使用实际绘制的高度）
         actual_rows_used = min(total_chars, max_chars_per_column)
@@ -860,23 +1117,32 @@ class BookmarkGenerator:
         Returns:
             List[str]: 文本行列表
         """
-        lines = []
-        current_line = ""
-
-        for char in text:
-            test_line = current_line + char
-            bbox = draw.textbbox((0, 0), test_line, font=font)
-            width = bbox[2] - bbox[0]
-
-            if width <= max_width:
-                current_line = test_line
-            else:
-                if current_line:
-                    lines.append(current_line)
-                current_line = char
+        # 字符宽度缓存挂在字体句柄上：字体经lru_cache复用，
+        # 同一字符跨请求只测量一次
+        char_widths = getattr(font, "_char_width_cache", None)
+        if char_widths is None:
+            char_widths = {}
+            font._char_width_cache = char_widths
+        for c in set(text):
+            if c not in char_widths:
+                char_widths[c] = font.getlength(c)
+
+        # 换行决策批量化：前缀和 + 二分查找，每行一次searchsorted
+        widths = np.fromiter(
+            (char_widths[c] for c in text), dtype=np.float32, count=len(text)
+        )
+        cum_widths = np.cumsum(widths)
 
-        if current_line:
-            lines.append(current_line)
+        lines = []
+        start = 0
+        total = len(text)
+        while start < total:
+            base = cum_widths[start - 1] if start else 0.0
+            end = int(np.searchsorted(cum_widths, base + max_width, side="right"))
+            if end <= start:
+                end = start + 1  # 单个字符超宽也要推进，避免死循环
+            lines.append(text[start:end])
+            start = end
 
         return lines
 
@@ -943,50 +1209,17 @@ class BookmarkGenerator:
                 'height': text_height
             }
 
-        # 否则使用布局默认的文本区域
-        if layout == LayoutType.HORIZONTAL:
-            # 右侧文字区域
-            text_x = int(width * 0.48) + 20
-            text_width = width - text_x - 20
-            return {
-                'x_start': text_x,
-                'y_start': 40,
-                'width': text_width - 20,
-                'height': height - 40
-            }
-        elif layout == LayoutType.VERTICAL:
-            # 下方文字区域
-            text_y_start = int(height * 0.58)
-            text_x = 20
-            text_width = width - 40
-            return {
-                'x_start': text_x,
-                'y_start': text_y_start + 40,
-                'width': text_width,
-                'height': height - text_y_start - 20
-            }
-        elif layout == LayoutType.CENTERED:
-            # 居中文字
-            margin = int(width * 0.15)
-            text_y_start = margin + int((height - 2 * margin) * 0.65)
-            text_width = width - 2 * margin - 40
-            return {
-                'x_start': margin + 20,
-                'y_start': text_y_start,
-                'width': text_width,
-                'height': height - text_y_start - 20
-            }
-        else:  # MOSAIC or FULL_BLEED
-            # 底部文字区域
-            text_height = int(height * 0.25)
-            text_y = height - text_height - 20
-            text_width = width - 40
-            return {
-                'x_start': 20,
-                'y_start': text_y + 20,
-                'width': text_width,
-                'height': text_height - 20
-            }
+        # 否则使用布局默认的文本区域（查表分派，未知布局回退到底部区域）
+        area_fn = self._LAYOUT_TEXT_AREAS.get(
+            layout, self._LAYOUT_TEXT_AREAS[LayoutType.FULL_BLEED]
+        )
+        x_start, y_start, text_width, text_height = area_fn(width, height)
+        return {
+            'x_start': x_start,
+            'y_start': y_start,
+            'width': text_width,
+            'height': text_height
+        }
 
     def _add_plain_text(
         self,
@@ -996,12 +1229,15 @@ class BookmarkGenerator:
         layout: LayoutType,
         text: str,
         colors: List[str],
-        text_position: Optional[TextPosition] = None
+        text_position: Optional[TextPosition] = None,
+        offset: Tuple[int, int] = (0, 0)
     ):
         """添加普通文本（向后兼容）"""
         try:
-            # 获取文本区域
+            # 获取文本区域（平移到目标区域偏移处）
             text_area = self._get_text_area(width, height, layout, text_position)
+            text_area['x_start'] += offset[0]
+            text_area['y_start'] += offset[1]
 
             # 尝试加载字体
             font_size = max(16, width // 15)
@@ -1046,21 +1282,39 @@ class BookmarkGenerator:
 
     def _add_decorative_elements(
         self,
-        draw: ImageDraw.ImageDraw,
+        image: Image.Image,
         width: int,
         height: int,
         complexity: int,
-        colors: List[str]
+        colors: List[str],
+        offset: Tuple[int, int] = (0, 0)
     ):
         """根据复杂度添加装饰元素"""
+        # 装饰只依赖(尺寸, 复杂度, 配色)：预光栅化成RGBA覆盖层缓存，
+        # 同参数的后续书签只做一次带mask的paste合成
+        overlay = _decoration_overlay(width, height, complexity, tuple(colors))
+        if overlay is not None:
+            image.paste(overlay, offset, overlay)
+
+    @staticmethod
+    def _draw_decorations(
+        image: Image.Image,
+        width: int,
+        height: int,
+        complexity: int,
+        colors: Tuple[str, ...]
+    ):
+        """在覆盖层上绘制装饰图形（由_decoration_overlay调用）"""
+        draw = ImageDraw.Draw(image)
         accent_color = colors[1] if len(colors) > 1 else colors[0]
+        ox, oy = 0, 0
 
         if complexity >= 2:
             # 添加边框
             border_width = 3 if complexity >= 4 else 2
             margin = 10
             draw.rectangle(
-                [(margin, margin), (width - margin - 1, height - margin - 1)],
+                [(ox + margin, oy + margin), (ox + width - margin - 1, oy + height - margin - 1)],
                 outline=accent_color,
                 width=border_width
             )
@@ -1071,36 +1325,37 @@ class BookmarkGenerator:
             line_width = 2
 
             # 左上角
-            draw.line([(0, corner_size), (0, 0), (corner_size, 0)], fill=accent_color, width=line_width)
+            draw.line([(ox, oy + corner_size), (ox, oy), (ox + corner_size, oy)], fill=accent_color, width=line_width)
             # 右上角
-            draw.line([(width - corner_size, 0), (width - 1, 0), (width - 1, corner_size)], fill=accent_color, width=line_width)
+            draw.line([(ox + width - corner_size, oy), (ox + width - 1, oy), (ox + width - 1, oy + corner_size)], fill=accent_color, width=line_width)
             # 左下角
-            draw.line([(0, height - corner_size - 1), (0, height - 1), (corner_size, height - 1)], fill=accent_color, width=line_width)
+            draw.line([(ox, oy + height - corner_size - 1), (ox, oy + height - 1), (ox + corner_size, oy + height - 1)], fill=accent_color, width=line_width)
             # 右下角
-            draw.line([(width - corner_size - 1, height - 1), (width - 1, height - 1), (width - 1, height - corner_size - 1)], fill=accent_color, width=line_width)
+            draw.line([(ox + width - corner_size - 1, oy + height - 1), (ox + width - 1, oy + height - 1), (ox + width - 1, oy + height - corner_size - 1)], fill=accent_color, width=line_width)
 
         if complexity >= 4:
             # 添加小圆点装饰
             dot_size = 4
             dot_margin = 20
             positions = [
-                (dot_margin, dot_margin),
-                (width - dot_margin, dot_margin),
-                (dot_margin, height - dot_margin),
-                (width - dot_margin, height - dot_margin),
+                (ox + dot_margin, oy + dot_margin),
+                (ox + width - dot_margin, oy + dot_margin),
+                (ox + dot_margin, oy + height - dot_margin),
+                (ox + width - dot_margin, oy + height - dot_margin),
             ]
 
+            # 同半径同色的圆点只光栅化一次，四个位置贴同一精灵
+            sprite = _dot_sprite(
+                dot_size, colors[-1] if len(colors) > 2 else accent_color
+            )
             for x, y in positions:
-                draw.ellipse(
-                    [(x - dot_size, y - dot_size), (x + dot_size, y + dot_size)],
-                    fill=colors[-1] if len(colors) > 2 else accent_color
-                )
+                image.paste(sprite, (x - dot_size, y - dot_size), sprite)
 
         if complexity >= 5:
             # 添加分割线
-            line_y = height - 50
+            line_y = oy + height - 50
             draw.line(
-                [(40, line_y), (width - 40, line_y)],
+                [(ox + 40, line_y), (ox + width - 40, line_y)],
                 fill=accent_color,
                 width=1
             )
@@ -1119,6 +1374,14 @@ class BookmarkGenerator:
         2. 选择适当的裁剪方式（中心、边缘等）
         3. 缩放到目标尺寸
         """
+        # 大尺寸JPEG先用draft在DCT域按1/2、1/4、1/8预缩放，
+        # 跳过大部分像素解码，再做精确的LANCZOS重采样
+        if (
+            image.format == "JPEG"
+            and max(image.size) > 2 * max(target_width, target_height)
+        ):
+            image.draft("RGB", (target_width * 2, target_height * 2))
+
         # 计算宽高比
         target_ratio = target_width / target_height
         img_ratio = image.width / image.height
@@ -1127,19 +1390,13 @@ class BookmarkGenerator:
             # 比例相近，直接缩放
             return image.resize((target_width, target_height), Resampling.LANCZOS)
 
-        # 需要裁剪
-        if img_ratio > target_ratio:
-            # 原图更宽，裁剪两侧
-            new_width = int(image.height * target_ratio)
-            left = (image.width - new_width) // 2
-            cropped = image.crop((left, 0, left + new_width, image.height))
-        else:
-            # 原图更高，裁剪上下
-            new_height = int(image.width / target_ratio)
-            top = (image.height - new_height) // 2
-            cropped = image.crop((0, top, image.width, top + new_height))
-
-        return cropped.resize((target_width, target_height), Resampling.LANCZOS)
+        # 需要裁剪：ImageOps.fit在单次重采样中完成居中裁剪+缩放
+        return ImageOps.fit(
+            image,
+            (target_width, target_height),
+            method=Resampling.LANCZOS,
+            centering=(0.5, 0.5)
+        )
 
     def _wrap_text(
         self,
@@ -1162,23 +1419,7 @@ class BookmarkGenerator:
             color: 颜色
         """
         x, y = position
-        lines = []
-        current_line = ""
-
-        for char in text:
-            test_line = current_line + char
-            bbox = draw.textbbox((0, 0), test_line, font=font)
-            width = bbox[2] - bbox[0]
-
-            if width <= max_width:
-                current_line = test_line
-            else:
-                if current_line:
-                    lines.append(current_line)
-                current_line = char
-
-        if current_line:
-            lines.append(current_line)
+        lines = self._wrap_text_lines(draw, text, max_width, font)
 
         # 绘制每一行
         line_height = font.size + 8
@@ -1186,35 +1427,12 @@ class BookmarkGenerator:
             draw.text((x, y + i * line_height), line, fill=color, font=font)
 
     def _load_font(self, size: int) -> ImageFont.FreeTypeFont:
-        """加载字体，支持中英文"""
-        # 按优先级尝试加载系统字体
-        font_paths = [
-            # macOS 中文字体
-            "/System/Library/Fonts/STHeiti Medium.ttc",
-            "/System/Library/Fonts/STHeiti Light.ttc",
-            "/System/Library/Fonts/Hiragino Sans GB.ttc",
-            "/System/Library/Fonts/PingFang.ttc",
-            "/System/Library/Fonts/Supplemental/Songti.ttc",
-            # Linux 中文字体
-            "/usr/share/fonts/truetype/wqy/wqy-microhei.ttc",
-            "/usr/share/fonts/truetype/wqy/wqy-zenhei.ttc",
-            "/usr/share/fonts/opentype/noto/NotoSansCJK-Regular.ttc",
-            # Windows 中文字体
-            "C:/Windows/Fonts/msyh.ttc",
-            "C:/Windows/Fonts/simhei.ttf",
-            # 回退字体
-            "/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf",
-        ]
-
-        for font_path in font_paths:
-            path_obj = Path(font_path)
-            if path_obj.exists():
-                try:
-                    logger.info(f"✅ [FONT] Successfully loaded: {font_path}")
-                    return ImageFont.truetype(str(path_obj), size)
-                except Exception as e:
-                    logger.warning(f"⚠️  [FONT] Failed to load {font_path}: {e}")
-                    continue
+        """加载字体，支持中英文（路径在模块导入时已解析，无逐次探测）"""
+        if FONT_PATH:
+            try:
+                return _load_font_cached(FONT_PATH, size)
+            except Exception as e:
+                logger.warning(f"⚠️  [FONT] Failed to load {FONT_PATH}: {e}")
 
         # 如果所有字体都失败，使用默认字体（不支持中文）
         logger.warning("⚠️  [FONT] No Chinese font found, using default font (Chinese characters will show as squares)")
@@ -1223,40 +1441,35 @@ class BookmarkGenerator:
 
     def _hex_to_rgb(self, hex_color: str) -> Tuple[int, int, int]:
         """十六进制颜色转RGB"""
-        hex_color = hex_color.lstrip("#")
-        return tuple(int(hex_color[i:i+2], 16) for i in (0, 2, 4))
+        return _hex_to_rgb_cached(hex_color)
 
     def _lighten_color(self, hex_color: str, percent: int) -> str:
         """使颜色变亮"""
-        r, g, b = self._hex_to_rgb(hex_color)
-        r = min(255, int(r * (1 + percent / 100)))
-        g = min(255, int(g * (1 + percent / 100)))
-        b = min(255, int(b * (1 + percent / 100)))
-        return f"#{r:02X}{g:02X}{b:02X}"
+        return _lighten_color_cached(hex_color, percent)
 
     def _draw_safe_zone_guide(
         self,
-        draw: ImageDraw.ImageDraw,
+        image: Image.Image,
         width: int,
         height: int,
         bleed: int,
         safe_margin: int
     ):
-        """绘制安全区参考线（用于调试）"""
-        # 出血线（红色虚线）
-        draw.rectangle(
-            [(bleed, bleed), (width - bleed, height - bleed)],
-            outline="#FF0000",
-            width=1
-        )
+        """绘制安全区参考线（用于调试）
 
-        # 安全线（绿色虚线）
-        draw.rectangle(
-            [(bleed + safe_margin, bleed + safe_margin),
-             (width - bleed - safe_margin, height - bleed - safe_margin)],
-            outline="#00FF00",
-            width=1
-        )
+        参考线按画布参数预光栅化并缓存，同一尺寸反复调试时
+        只做一次贴图而非两次矩形描边。
+        """
+        overlay = _safe_zone_guide_overlay(width, height, bleed, safe_margin)
+        image.paste(overlay, (0, 0), overlay)
+
+
+def _generate_final_worker(
+    request: GenerateFinalRequest,
+    user_photo_path: Optional[str] = None
+) -> Tuple[str, str]:
+    """进程池worker入口：用各worker进程内的全局实例渲染，避免跨进程传实例"""
+    return bookmark_generator.generate_final(request, user_photo_path)
 
 
 # 全局实例
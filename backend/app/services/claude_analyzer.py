@@ -3,15 +3,19 @@
 # Claude Vision API 调用封装
 #
 
+import asyncio
 import base64
-import json
+import hashlib
 import time
 from typing import List, Optional
 from pathlib import Path
+import aiofiles
 import httpx
+import orjson
 from loguru import logger
 
 from app.core.config import settings
+from app.utils.rate_limit import claude_bucket
 from app.models.schemas import (
     ImageAnalysisResult,
     LayoutInfo,
@@ -25,6 +29,34 @@ from app.models.schemas import (
 )
 
 
+# 模块级持久HTTP客户端：复用连接池和TLS会话，HTTP/2下并发请求可多路复用
+_client = httpx.AsyncClient(
+    http2=True,
+    timeout=60.0,
+    limits=httpx.Limits(max_connections=32, max_keepalive_connections=16)
+)
+
+# 限制同时在途的Claude调用数：突发上传时后续请求在此排队（FIFO），
+# 而不是各自占满整个分析延迟的出站连接
+_api_semaphore = asyncio.Semaphore(8)
+
+
+async def close_http_client():
+    """关闭持久HTTP客户端（应用关闭时调用）"""
+    if not _client.is_closed:
+        await _client.aclose()
+
+
+async def warm_http_client():
+    """预热到Anthropic的TLS/HTTP2连接（应用启动时调用，省去首个请求的握手RTT）"""
+    try:
+        await _client.get("https://api.anthropic.com/", timeout=3.0)
+        logger.debug("🔥 [CLAUDE] Connection pool warmed")
+    except Exception:
+        # 预热失败无妨，首个请求正常握手即可
+        pass
+
+
 class ClaudeAnalyzer:
     """Claude Vision API 分析器"""
 
@@ -147,15 +179,21 @@ class ClaudeAnalyzer:
 
 请开始分析："""
 
+    # 缓存的分析结果条数上限
+    ANALYSIS_CACHE_SIZE = 128
+
     def __init__(self):
         self.api_key = settings.ANTHROPIC_API_KEY
         self.model = settings.CLAUDE_MODEL
         self.max_tokens = settings.CLAUDE_MAX_TOKENS
         self.api_url = "https://api.anthropic.com/v1/messages"
+        # 分析结果缓存：同一组图片重复分析（重试/重新生成）直接复用，
+        # 省掉一次完整的Claude往返
+        self._analysis_cache: dict = {}
 
-    def _encode_image(self, image_path: str) -> str:
+    async def _encode_image(self, image_path: str) -> str:
         """
-        将图片编码为base64
+        将图片编码为base64（异步读盘，不阻塞事件循环）
 
         Args:
             image_path: 图片路径
@@ -163,8 +201,8 @@ class ClaudeAnalyzer:
         Returns:
             base64编码的图片字符串
         """
-        with open(image_path, "rb") as f:
-            image_data = f.read()
+        async with aiofiles.open(image_path, "rb") as f:
+            image_data = await f.read()
         return base64.b64encode(image_data).decode("utf-8")
 
     async def analyze_images(self, image_paths: List[str]) -> ImageAnalysisResult:
@@ -187,25 +225,28 @@ class ClaudeAnalyzer:
         logger.debug(f"   - Model: {self.model}")
         logger.debug(f"   - Max tokens: {self.max_tokens}")
 
-        # 准备图片数据
+        # 准备图片数据：并发编码，多图延迟约等于单图
         logger.debug("📸 [CLAUDE] Encoding images to base64...")
+        encode_start = time.time()
+        encoded_images = await asyncio.gather(
+            *(self._encode_image(p) for p in image_paths)
+        )
+        encode_time = time.time() - encode_start
+
         images = []
         total_size = 0
 
-        for idx, img_path in enumerate(image_paths):
-            logger.debug(f"   - Encoding image {idx + 1}/{len(image_paths)}: {img_path}")
-
-            encode_start = time.time()
-            base64_image = self._encode_image(img_path)
-            encode_time = time.time() - encode_start
-
+        for img_path, base64_image in zip(image_paths, encoded_images):
             img_size = len(base64_image)
             total_size += img_size
             media_type = self._get_media_type(img_path)
-
-            logger.debug(f"     * Media type: {media_type}")
-            logger.debug(f"     * Base64 size: {img_size / 1024:.2f}KB")
-            logger.debug(f"     * Encode time: {encode_time:.2f}s")
+            # opt(lazy=True)：格式化只在DEBUG级别被接收时执行
+            logger.opt(lazy=True).debug(
+                "   - {}: {}, {:.2f}KB",
+                lambda p=img_path: p,
+                lambda m=media_type: m,
+                lambda s=img_size: s / 1024
+            )
 
             images.append({
                 "type": "image",
@@ -216,7 +257,19 @@ class ClaudeAnalyzer:
                 }
             })
 
-        logger.info(f"📸 [CLAUDE] All images encoded, total size: {total_size / 1024:.2f}KB")
+        logger.info(
+            f"📸 [CLAUDE] All images encoded in {encode_time:.2f}s, "
+            f"total size: {total_size / 1024:.2f}KB"
+        )
+
+        # 按图片内容哈希查缓存（顺序无关）
+        cache_key = hashlib.sha256(
+            "".join(sorted(encoded_images)).encode("ascii")
+        ).hexdigest()
+        cached_result = self._analysis_cache.get(cache_key)
+        if cached_result is not None:
+            logger.info("🗃️ [CLAUDE] Analysis cache hit, skipping API call")
+            return cached_result
 
         # 构建请求内容
         logger.debug("📝 [CLAUDE] Building request payload...")
@@ -246,52 +299,71 @@ class ClaudeAnalyzer:
             ]
         }
 
-        logger.debug(f"   - Payload size (approx): {len(json.dumps(payload)) / 1024:.2f}KB")
+        # 预序列化payload：orjson对带大base64字符串的body快数倍，
+        # 用content=发送避免httpx内部再做一次json编码
+        payload_bytes = orjson.dumps(payload)
+        logger.opt(lazy=True).debug(
+            "   - Payload size: {:.2f}KB", lambda: len(payload_bytes) / 1024
+        )
 
         try:
             # 发送API请求
             logger.info(f"🌐 [CLAUDE] Sending request to {self.api_url}")
             request_start = time.time()
 
-            async with httpx.AsyncClient(timeout=60.0) as client:
-                response = await client.post(
+            async with _api_semaphore:
+                # 客户端侧限流，平滑突发请求
+                await claude_bucket.acquire()
+                response = await _client.post(
                     self.api_url,
                     headers=headers,
-                    json=payload
+                    content=payload_bytes
                 )
 
-                request_time = time.time() - request_start
-                logger.info(f"🌐 [CLAUDE] Response received in {request_time:.2f}s")
-                logger.debug(f"   - Status: {response.status_code}")
+            request_time = time.time() - request_start
+            logger.info(f"🌐 [CLAUDE] Response received in {request_time:.2f}s")
+            logger.debug(f"   - Status: {response.status_code}")
 
-                response.raise_for_status()
+            response.raise_for_status()
 
-                # 解析响应
-                parse_start = time.time()
-                result = response.json()
-                parse_time = time.time() - parse_start
+            # 解析响应
+            parse_start = time.time()
+            result = response.json()
+            parse_time = time.time() - parse_start
 
-                logger.debug(f"📦 [CLAUDE] Response parsed in {parse_time:.2f}s")
+            logger.debug(f"📦 [CLAUDE] Response parsed in {parse_time:.2f}s")
+
+            # 提取使用量信息
+            usage = result.get("usage", {})
+            if usage:
+                logger.debug("💰 [CLAUDE] Token usage:")
+                logger.debug(f"   - Input tokens: {usage.get('input_tokens', 'N/A')}")
+                logger.debug(f"   - Output tokens: {usage.get('output_tokens', 'N/A')}")
+                logger.opt(lazy=True).debug(
+                    "   - Total tokens: {}",
+                    lambda: usage.get("input_tokens", 0) + usage.get("output_tokens", 0)
+                )
 
-                # 提取使用量信息
-                usage = result.get("usage", {})
-                if usage:
-                    logger.debug(f"💰 [CLAUDE] Token usage:")
-                    logger.debug(f"   - Input tokens: {usage.get('input_tokens', 'N/A')}")
-                    logger.debug(f"   - Output tokens: {usage.get('output_tokens', 'N/A')}")
-                    logger.debug(f"   - Total tokens: {usage.get('input_tokens', 0) + usage.get('output_tokens', 0)}")
+            # 提取分析结果
+            content_block = result.get("content", [])
+            if not content_block:
+                logger.error("❌ [CLAUDE] Empty response from API")
+                raise ValueError("Empty response from Claude API")
 
-                # 提取分析结果
-                content_block = result.get("content", [])
-                if not content_block:
-                    logger.error("❌ [CLAUDE] Empty response from API")
-                    raise ValueError("Empty response from Claude API")
+            analysis_text = content_block[0].get("text", "")
+            logger.opt(lazy=True).debug(
+                "📄 [CLAUDE] Analysis text length: {} chars", lambda: len(analysis_text)
+            )
 
-                analysis_text = content_block[0].get("text", "")
-                logger.debug(f"📄 [CLAUDE] Analysis text length: {len(analysis_text)} chars")
+            logger.debug("🔧 [CLAUDE] Parsing analysis result...")
+            analysis_result = self._parse_analysis_result(analysis_text)
 
-                logger.debug("🔧 [CLAUDE] Parsing analysis result...")
-                return self._parse_analysis_result(analysis_text)
+            # 写入缓存（超限时按插入顺序淘汰最旧条目）
+            if len(self._analysis_cache) >= self.ANALYSIS_CACHE_SIZE:
+                self._analysis_cache.pop(next(iter(self._analysis_cache)))
+            self._analysis_cache[cache_key] = analysis_result
+
+            return analysis_result
 
         except httpx.HTTPStatusError as e:
             logger.error(f"❌ [CLAUDE] HTTP error: {e.response.status_code}")
@@ -391,89 +463,34 @@ class ClaudeAnalyzer:
 
             json_str = analysis_text[json_start:json_end]
             logger.debug(f"   - Extracted JSON: {json_start} -> {json_end}")
-            logger.debug(f"   - JSON length: {len(json_str)} chars")
+            logger.opt(lazy=True).debug(
+                "   - JSON length: {} chars", lambda: len(json_str)
+            )
 
-            data = json.loads(json_str)
+            data = orjson.loads(json_str)
             logger.debug("   - JSON parsed successfully")
 
-            # 解析layout
-            layout_data = data.get("layout", {})
-            layout = LayoutInfo(
-                type=LayoutType(layout_data.get("type", "center-focused")),
-                confidence=layout_data.get("confidence", 0.8),
-                description=layout_data.get("description", "")
-            )
-            logger.debug(f"   - Layout: {layout.type.value} (confidence: {layout.confidence})")
-
-            # 解析colors
-            colors_data = data.get("colors", {})
-            colors = ColorScheme(
-                primary=[
-                    DesignColor(**c) for c in colors_data.get("primary", [])
-                ],
-                secondary=[
-                    DesignColor(**c) for c in colors_data.get("secondary", [])
-                ],
-                accent=[
-                    DesignColor(**c) for c in colors_data.get("accent", [])
-                ],
-                neutral=[
-                    DesignColor(**c) for c in colors_data.get("neutral", [])
-                ],
-                palette_name=colors_data.get("palette_name", "未命名配色"),
-                mood=colors_data.get("mood", ""),
-                harmony=colors_data.get("harmony", "")
-            )
-            logger.debug(f"   - Palette: {colors.palette_name}")
-            logger.debug(f"   - Colors: {len(colors.primary)} primary, {len(colors.secondary)} secondary, {len(colors.accent)} accent")
-
-            # 解析typography
-            typo_data = data.get("typography", {})
-            typography = Typography(
-                primary_font=typo_data.get("primary_font", ""),
-                body_font=typo_data.get("body_font", ""),
-                font_pairs=typo_data.get("font_pairs", []),
-                text_color=typo_data.get("text_color", "#000000")
+            # 整树一次性校验：pydantic-core（Rust）单遍遍历完成全部子模型
+            # 构造和枚举转换，缺失字段由schema默认值兜底。
+            # 原始响应全文只在DEBUG级别保留，避免大响应在结果对象/
+            # 序列化链路里重复存一份
+            raw_analysis = (
+                analysis_text if settings.LOG_LEVEL == "DEBUG" else None
             )
-            logger.debug(f"   - Font: {typography.primary_font} + {typography.body_font}")
-
-            # 解析style_attributes
-            style_data = data.get("style_attributes", {})
-            style_attributes = StyleAttributes(
-                keywords=style_data.get("keywords", []),
-                mood=MoodType(style_data.get("mood", MoodType.WARM)),
-                complexity=style_data.get("complexity", 3),
-                aesthetic_tags=style_data.get("aesthetic_tags", [])
-            )
-            logger.debug(f"   - Mood: {style_attributes.mood.value}")
-            logger.debug(f"   - Complexity: {style_attributes.complexity}")
-
-            # 解析decorative_elements
-            deco_data = data.get("decorative_elements", {})
-            decorative_elements = DecorativeElements(
-                has_border=deco_data.get("has_border", False),
-                has_pattern=deco_data.get("has_pattern", False),
-                has_icon=deco_data.get("has_icon", False),
-                suggested_elements=deco_data.get("suggested_elements", [])
+            result = ImageAnalysisResult.model_validate(
+                {**data, "raw_analysis": raw_analysis}
             )
 
-            # 构建结果
-            result = ImageAnalysisResult(
-                layout=layout,
-                colors=colors,
-                typography=typography,
-                style_attributes=style_attributes,
-                decorative_elements=decorative_elements,
-                suggestions=data.get("suggestions", []),
-                raw_analysis=analysis_text
-            )
+            logger.debug(f"   - Layout: {result.layout.type.value} (confidence: {result.layout.confidence})")
+            logger.debug(f"   - Mood: {result.style_attributes.mood.value}")
+            logger.debug(f"   - Complexity: {result.style_attributes.complexity}")
 
             parse_time = time.time() - parse_start
             logger.info(f"✅ [CLAUDE] Result parsed in {parse_time:.2f}s")
             logger.info(f"✅ [CLAUDE] Final palette: {result.colors.palette_name}")
             return result
 
-        except json.JSONDecodeError as e:
+        except orjson.JSONDecodeError as e:
             logger.error(f"❌ [CLAUDE] JSON decode error: {e}")
             logger.error(f"❌ [CLAUDE] Raw response: {analysis_text[:500]}...")
             raise ValueError(f"Invalid JSON response from Claude: {str(e)}")
@@ -3,7 +3,10 @@
 # 文生图服务（使用GLM CogView）
 #
 
+import aiofiles
 import httpx
+import itertools
+import orjson
 import uuid
 import jwt
 import time
@@ -12,6 +15,62 @@ from typing import Optional
 from loguru import logger
 
 from app.core.config import settings
+from app.utils.rate_limit import glm_bucket
+
+
+# 模块级持久HTTP客户端：复用连接池和TLS会话，避免每次请求重新握手
+_client = httpx.AsyncClient(
+    http2=True,
+    timeout=60.0,
+    limits=httpx.Limits(max_keepalive_connections=20)
+)
+
+
+async def close_http_client():
+    """关闭持久HTTP客户端（应用关闭时调用）"""
+    if not _client.is_closed:
+        await _client.aclose()
+
+
+async def warm_http_client():
+    """预热到GLM的TLS/HTTP2连接（应用启动时调用，省去首个请求的握手RTT）"""
+    try:
+        await _client.get("https://open.bigmodel.cn/", timeout=3.0)
+        logger.debug("🔥 [ImageGen] GLM connection pool warmed")
+    except Exception:
+        # 预热失败无妨，首个请求正常握手即可
+        pass
+
+
+# 提示词映射表：内容不变，提升为模块常量避免每次请求重建
+MOOD_MAP = {
+    "温暖治愈": "温暖治愈风格，柔和色调",
+    "清新自然": "清新自然风格，绿色植物元素",
+    "专业简约": "专业简约风格，留白设计",
+    "活泼可爱": "活泼可爱风格，色彩明快",
+    "优雅复古": "优雅复古风格，古典元素",
+    "现代时尚": "现代时尚风格，简洁设计",
+    "艺术文艺": "艺术文艺风格，创意设计"
+}
+
+STYLE_MAP = {
+    "modern": "现代简约",
+    "vintage": "复古风格",
+    "minimal": "极简主义",
+    "elegant": "优雅风格",
+    "artistic": "艺术风格",
+    "natural": "自然风格"
+}
+
+# mock图片URL（使用Unsplash），轮询取代每次RNG调用
+_MOCK_URLS = (
+    "https://images.unsplash.com/photo-1507003211169-0a1dd7228f2d?w=600&h=900&fit=crop",
+    "https://images.unsplash.com/photo-1441974231531-c6227db76b6e?w=600&h=900&fit=crop",
+    "https://images.unsplash.com/photo-1497366216548-37526070297c?w=600&h=900&fit=crop",
+    "https://images.unsplash.com/photo-1518837695005-2083093ee35b?w=600&h=900&fit=crop",
+    "https://images.unsplash.com/photo-1494438639946-1ebd1d20bf85?w=600&h=900&fit=crop"
+)
+_mock_url_iter = itertools.cycle(_MOCK_URLS)
 
 
 class ImageGenerator:
@@ -22,10 +81,13 @@ class ImageGenerator:
         self.base_url = "https://open.bigmodel.cn/api/paas/v4/images/generations"
         self.model = "cogview-3-plus"  # GLM文生图模型
         self.timeout = 60.0
+        # JWT缓存：token有效期1小时，剩余不足60秒才重新签名
+        self._token: Optional[str] = None
+        self._token_exp: float = 0.0
 
     def _generate_token(self) -> str:
         """
-        生成GLM API所需的JWT token
+        生成GLM API所需的JWT token（带缓存，临期60秒内才重新签名）
 
         GLM API Key格式: id.secret
         需要用secret生成JWT签名
@@ -33,6 +95,10 @@ class ImageGenerator:
         if not self.api_key:
             raise ValueError("GLM_API_KEY not configured")
 
+        now = time.time()
+        if self._token and now < self._token_exp - 60:
+            return self._token
+
         try:
             api_key_id, api_key_secret = self.api_key.split(".")
         except ValueError:
@@ -40,10 +106,11 @@ class ImageGenerator:
             raise ValueError("GLM_API_KEY must be in format: id.secret")
 
         # JWT payload (GLM要求格式)
+        now_ms = int(now) * 1000
         payload = {
             "api_key": api_key_id,
-            "exp": int(time.time()) * 1000 + 3600000,  # 毫秒时间戳，1小时后过期
-            "timestamp": int(time.time()) * 1000  # 毫秒时间戳
+            "exp": now_ms + 3600000,  # 毫秒时间戳，1小时后过期
+            "timestamp": now_ms  # 毫秒时间戳
         }
 
         # JWT header (GLM要求特定格式)
@@ -54,6 +121,8 @@ class ImageGenerator:
 
         # 使用HS256算法和secret生成token
         token = jwt.encode(payload, api_key_secret, algorithm="HS256", headers=headers)
+        self._token = token
+        self._token_exp = now + 3600
 
         logger.debug(f"🔐 [ImageGen] Generated JWT token with API key ID: {api_key_id}")
         return token
@@ -107,20 +176,25 @@ class ImageGenerator:
             }
 
             logger.info(f"📤 [ImageGen] Sending request to GLM API")
-            logger.debug(f"   - model: {self.model}")
-            logger.debug(f"   - size: {size}")
-            logger.debug(f"   - prompt: {full_prompt[:50]}...")
-
-            async with httpx.AsyncClient(timeout=self.timeout) as client:
-                response = await client.post(self.base_url, headers=headers, json=payload)
-
-                # 打印详细的错误信息
-                if response.status_code != 200:
-                    logger.error(f"❌ [ImageGen] GLM API returned {response.status_code}")
-                    logger.error(f"   Response: {response.text}")
-
-                response.raise_for_status()
-                result = response.json()
+            logger.opt(lazy=True).debug(
+                "   - model: {}, size: {}, prompt: {}...",
+                lambda: self.model,
+                lambda: size,
+                lambda: full_prompt[:50]
+            )
+
+            # 客户端侧限流，平滑突发请求
+            await glm_bucket.acquire()
+            response = await _client.post(self.base_url, headers=headers, json=payload)
+
+            # 打印详细的错误信息
+            if response.status_code != 200:
+                logger.error(f"❌ [ImageGen] GLM API returned {response.status_code}")
+                logger.error(f"   Response: {response.text}")
+
+            response.raise_for_status()
+            # orjson解析响应字节，绕过response.json()内部的stdlib json
+            result = orjson.loads(response.content)
 
             # 提取图片URL
             if "data" in result and len(result["data"]) > 0:
@@ -153,30 +227,13 @@ class ImageGenerator:
 
         # 添加氛围（如果有）
         if mood:
-            mood_map = {
-                "温暖治愈": "温暖治愈风格，柔和色调",
-                "清新自然": "清新自然风格，绿色植物元素",
-                "专业简约": "专业简约风格，留白设计",
-                "活泼可爱": "活泼可爱风格，色彩明快",
-                "优雅复古": "优雅复古风格，古典元素",
-                "现代时尚": "现代时尚风格，简洁设计",
-                "艺术文艺": "艺术文艺风格，创意设计"
-            }
-            mood_desc = mood_map.get(mood, "")
+            mood_desc = MOOD_MAP.get(mood, "")
             if mood_desc:
                 parts.append(mood_desc)
 
         # 添加风格（如果有）
         if style:
-            style_map = {
-                "modern": "现代简约",
-                "vintage": "复古风格",
-                "minimal": "极简主义",
-                "elegant": "优雅风格",
-                "artistic": "艺术风格",
-                "natural": "自然风格"
-            }
-            style_desc = style_map.get(style.lower(), "")
+            style_desc = STYLE_MAP.get(style.lower(), "")
             if style_desc:
                 parts.append(style_desc)
 
@@ -195,16 +252,8 @@ class ImageGenerator:
         Returns:
             str: Unsplash图片URL
         """
-        # 使用Unsplash的随机图片作为mock
-        mock_urls = [
-            "https://images.unsplash.com/photo-1507003211169-0a1dd7228f2d?w=600&h=900&fit=crop",
-            "https://images.unsplash.com/photo-1441974231531-c6227db76b6e?w=600&h=900&fit=crop",
-            "https://images.unsplash.com/photo-1497366216548-37526070297c?w=600&h=900&fit=crop",
-            "https://images.unsplash.com/photo-1518837695005-2083093ee35b?w=600&h=900&fit=crop",
-            "https://images.unsplash.com/photo-1494438639946-1ebd1d20bf85?w=600&h=900&fit=crop"
-        ]
-        import random
-        return random.choice(mock_urls)
+        # 轮询预置列表，避免每次fallback都走RNG
+        return next(_mock_url_iter)
 
     async def download_image(self, image_url: str) -> Path:
         """
@@ -219,17 +268,16 @@ class ImageGenerator:
         logger.info(f"📥 [ImageGen] Downloading image from: {image_url}")
 
         try:
-            async with httpx.AsyncClient(timeout=self.timeout) as client:
-                response = await client.get(image_url)
-                response.raise_for_status()
-                image_data = response.content
-
             # 保存到临时目录
             filename = f"generated_{uuid.uuid4().hex[:8]}.jpg"
             filepath = settings.DOWNLOAD_DIR / filename
 
-            with open(filepath, "wb") as f:
-                f.write(image_data)
+            # 流式下载：整图不进内存，边收边异步落盘
+            async with _client.stream("GET", image_url) as response:
+                response.raise_for_status()
+                async with aiofiles.open(filepath, "wb") as f:
+                    async for chunk in response.aiter_bytes(65536):
+                        await f.write(chunk)
 
             logger.info(f"✅ [ImageGen] Image downloaded: {filepath}")
             return filepath
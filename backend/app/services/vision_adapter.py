@@ -3,10 +3,18 @@
 # 多模型视觉分析适配器
 #
 
+import asyncio
+import base64
+import functools
+import hashlib
+import re
 from abc import ABC, abstractmethod
-from typing import List, Dict, Any
+from collections import Counter
+from pathlib import Path
+from typing import List, Dict, Any, Optional
 from enum import Enum
 import httpx
+import orjson
 from loguru import logger
 
 from app.models.schemas import (
@@ -21,6 +29,7 @@ from app.models.schemas import (
     DecorativeElements,
 )
 from app.core.config import settings
+from app.utils.rate_limit import glm_bucket, qwen_bucket
 
 
 class VisionModel(str, Enum):
@@ -30,13 +39,60 @@ class VisionModel(str, Enum):
     CLAUDE = "claude"
 
 
+# 提取响应中JSON块的正则：单次扫描取代find("{")+rfind("}")双遍历
+_JSON_RE = re.compile(r"\{.*\}", re.S)
+
+
+# 模型返回值 -> 标准枚举映射表：提升为模块常量避免每次解析重建
+_LAYOUT_MAP = {
+    "left-right": LayoutType.HORIZONTAL,
+    "top-bottom": LayoutType.VERTICAL,
+    "center-focused": LayoutType.CENTERED,
+    "mosaic-grid": LayoutType.MOSAIC,
+    "full-bleed-image": LayoutType.FULL_BLEED
+}
+
+_MOOD_MAP = {
+    "温暖治愈": MoodType.WARM,
+    "清新自然": MoodType.FRESH,
+    "专业简约": MoodType.PROFESSIONAL,
+    "活泼可爱": MoodType.PLAYFUL,
+    "优雅复古": MoodType.ELEGANT,
+    "现代时尚": MoodType.MODERN,
+    "艺术文艺": MoodType.ARTISTIC
+}
+
+
 class VisionAnalyzerAdapter(ABC):
     """视觉分析器适配器基类"""
 
+    # 缓存的分析结果条数上限
+    ANALYSIS_CACHE_SIZE = 128
+
     def __init__(self, api_key: str, model: str):
         self.api_key = api_key
         self.model = model
         self.timeout = 60.0
+        self._client: Optional[httpx.AsyncClient] = None
+        # 按图片内容哈希缓存分析结果：重复上传同一组图直接命中，
+        # 省掉整次模型往返
+        self._analysis_cache: dict = {}
+
+    @property
+    def http_client(self) -> httpx.AsyncClient:
+        """持久HTTP客户端（懒创建，跨请求复用连接池和TLS会话）"""
+        if self._client is None or self._client.is_closed:
+            self._client = httpx.AsyncClient(
+                http2=True,
+                timeout=self.timeout,
+                limits=httpx.Limits(max_keepalive_connections=20, max_connections=50)
+            )
+        return self._client
+
+    async def aclose(self):
+        """关闭持久HTTP客户端（应用关闭时调用）"""
+        if self._client is not None and not self._client.is_closed:
+            await self._client.aclose()
 
     @abstractmethod
     async def analyze_images(self, image_paths: List[str]) -> ImageAnalysisResult:
@@ -53,10 +109,74 @@ class VisionAnalyzerAdapter(ABC):
 
     def _encode_image(self, image_path: str) -> str:
         """将图片编码为base64"""
-        import base64
         with open(image_path, "rb") as f:
             image_data = f.read()
-        return base64.b64encode(image_data).decode("utf-8")
+        # base64输出只含ASCII，ascii解码比utf-8少一次编码探测
+        return base64.b64encode(image_data).decode("ascii")
+
+    async def _encode_images(self, image_paths: List[str]) -> List[str]:
+        """并行编码多张图片为base64（读盘+编码派发到线程池，不阻塞事件循环）"""
+        return await asyncio.gather(
+            *(asyncio.to_thread(self._encode_image, path) for path in image_paths)
+        )
+
+    @staticmethod
+    def _hash_file(image_path: str) -> str:
+        """计算单个文件的内容哈希"""
+        h = hashlib.sha256()
+        with open(image_path, "rb") as f:
+            h.update(f.read())
+        return h.hexdigest()
+
+    async def _analysis_cache_key(self, image_paths: List[str]) -> str:
+        """按(模型, 图片内容哈希集合)生成缓存键（顺序无关，读盘派发到线程池）"""
+        hashes = await asyncio.gather(
+            *(asyncio.to_thread(self._hash_file, p) for p in image_paths)
+        )
+        return hashlib.sha256(
+            f"{self.model}|{'|'.join(sorted(hashes))}".encode("ascii")
+        ).hexdigest()
+
+    def _store_analysis_cache(self, cache_key: str, result: ImageAnalysisResult):
+        """写入缓存（超限时按插入顺序淘汰最旧条目）"""
+        if len(self._analysis_cache) >= self.ANALYSIS_CACHE_SIZE:
+            self._analysis_cache.pop(next(iter(self._analysis_cache)))
+        self._analysis_cache[cache_key] = result
+
+    def _public_image_url(self, image_path: str) -> Optional[str]:
+        """临时目录内的文件映射为对外URL；未配置PUBLIC_BASE_URL时返回None"""
+        base = settings.PUBLIC_BASE_URL
+        if not base:
+            return None
+        try:
+            # 分析用的上传图片由_save_and_validate写入TEMP_DIR
+            rel = Path(image_path).relative_to(settings.TEMP_DIR)
+        except ValueError:
+            return None
+        return f"{base.rstrip('/')}{settings.API_V1_STR}/uploads/{rel}"
+
+    async def _image_url_entries(self, image_paths: List[str]) -> List[Dict[str, Any]]:
+        """
+        构建image_url内容条目
+
+        配置了PUBLIC_BASE_URL时直接传图片URL（省掉base64编码和约1/3的
+        请求体积），否则回退为base64 data URL。
+        """
+        urls = [self._public_image_url(p) for p in image_paths]
+        if urls and all(urls):
+            return [
+                {"type": "image_url", "image_url": {"url": url}}
+                for url in urls
+            ]
+
+        base64_images = await self._encode_images(image_paths)
+        return [
+            {
+                "type": "image_url",
+                "image_url": {"url": f"data:image/jpeg;base64,{base64_image}"}
+            }
+            for base64_image in base64_images
+        ]
 
     async def _make_request(
         self,
@@ -64,11 +184,11 @@ class VisionAnalyzerAdapter(ABC):
         headers: Dict[str, str],
         payload: Dict[str, Any]
     ) -> Dict[str, Any]:
-        """发送HTTP请求（通用方法）"""
-        async with httpx.AsyncClient(timeout=self.timeout) as client:
-            response = await client.post(url, headers=headers, json=payload)
-            response.raise_for_status()
-            return response.json()
+        """发送HTTP请求（通用方法，复用持久客户端）"""
+        response = await self.http_client.post(url, headers=headers, json=payload)
+        response.raise_for_status()
+        # orjson解析响应字节，绕过response.json()内部的stdlib json
+        return orjson.loads(response.content)
 
 
 class GLMAnalyzer(VisionAnalyzerAdapter):
@@ -92,6 +212,13 @@ class GLMAnalyzer(VisionAnalyzerAdapter):
             logger.error("❌ [GLM] SDK not available, using mock")
             return self._get_mock_result()
 
+        # 按图片内容哈希查缓存，重复上传跳过整次API调用
+        cache_key = await self._analysis_cache_key(image_paths)
+        cached_result = self._analysis_cache.get(cache_key)
+        if cached_result is not None:
+            logger.info("🗃️ [GLM] Analysis cache hit, skipping API call")
+            return cached_result
+
         try:
             # 准备消息内容 (使用GLM SDK的多模态格式)
             prompt = self._get_analysis_prompt()
@@ -104,15 +231,8 @@ class GLMAnalyzer(VisionAnalyzerAdapter):
                 }
             ]
 
-            # 添加图片
-            for img_path in image_paths:
-                base64_image = self._encode_image(img_path)
-                content_list.append({
-                    "type": "image_url",
-                    "image_url": {
-                        "url": f"data:image/jpeg;base64,{base64_image}"
-                    }
-                })
+            # 添加图片（有公网URL时直传URL，否则并行base64编码）
+            content_list.extend(await self._image_url_entries(image_paths))
 
             messages = [{
                 "role": "user",
@@ -121,8 +241,12 @@ class GLMAnalyzer(VisionAnalyzerAdapter):
 
             logger.info(f"🌐 [GLM] Calling API with {len(image_paths)} images")
 
-            # 调用GLM API
-            response = self.client.chat.completions.create(
+            # 客户端侧限流，平滑突发请求
+            await glm_bucket.acquire()
+
+            # 调用GLM API（SDK是同步阻塞的，派发到线程池避免卡住事件循环）
+            response = await asyncio.to_thread(
+                self.client.chat.completions.create,
                 model="glm-4v",
                 messages=messages,
                 temperature=0.7,
@@ -135,7 +259,12 @@ class GLMAnalyzer(VisionAnalyzerAdapter):
             logger.info(f"📝 [GLM] Response length: {len(result_content)}")
             logger.info(f"📝 [GLM] Response preview: {result_content[:500]}")
 
-            return self._parse_result(result_content)
+            analysis_result = self._parse_result(result_content)
+            if analysis_result is None:
+                # 解析失败走mock兜底，不写缓存，同图重试时可重新请求
+                return self._get_mock_result(preview=result_content[:500])
+            self._store_analysis_cache(cache_key, analysis_result)
+            return analysis_result
 
         except Exception as e:
             logger.error(f"❌ [GLM] Error: {str(e)}")
@@ -163,10 +292,8 @@ class GLMAnalyzer(VisionAnalyzerAdapter):
 
 **只返回JSON，不要任何其他文字**。"""
 
-    def _parse_result(self, content: str) -> ImageAnalysisResult:
-        """解析GLM返回的结果"""
-        import json
-
+    def _parse_result(self, content: str) -> Optional[ImageAnalysisResult]:
+        """解析GLM返回的结果（解析失败返回None，由调用方兜底）"""
         logger.info(f"🔍 [GLM] Parsing response content...")
 
         # 提取preview（原始内容的前500字符）
@@ -174,21 +301,21 @@ class GLMAnalyzer(VisionAnalyzerAdapter):
 
         # 尝试从content中提取JSON
         try:
-            json_start = content.find("{")
-            json_end = content.rfind("}") + 1
-            if json_start >= 0 and json_end > json_start:
-                json_str = content[json_start:json_end]
+            match = _JSON_RE.search(content)
+            if match:
+                json_str = match.group(0)
                 logger.info(f"🔍 [GLM] Extracted JSON: {json_str}")
-                data = json.loads(json_str)
+                data = orjson.loads(json_str)
                 logger.info(f"✅ [GLM] JSON parsed successfully")
                 return self._convert_to_result(data, preview=preview_text)
         except Exception as e:
             logger.warning(f"⚠️ [GLM] Failed to parse JSON: {e}")
-            logger.debug(f"⚠️ [GLM] Content was: {content}")
+            # 响应全文可能很长，只在DEBUG被接收时才拼进日志
+            logger.opt(lazy=True).debug("⚠️ [GLM] Content was: {}", lambda: content)
 
-        # 解析失败，返回mock结果
-        logger.info("⚠️ [GLM] Using mock result due to parse failure")
-        return self._get_mock_result(preview=preview_text)
+        # 解析失败返回None，由调用方兜底（mock结果不应进缓存）
+        logger.info("⚠️ [GLM] Parse failure, caller will fall back to mock")
+        return None
 
     def _convert_to_result(self, data: Dict, preview: str = None) -> ImageAnalysisResult:
         """将GLM返回的数据转换为标准格式"""
@@ -199,26 +326,10 @@ class GLMAnalyzer(VisionAnalyzerAdapter):
         complexity = data.get("complexity", 3)
 
         # 映射布局类型
-        layout_map = {
-            "left-right": LayoutType.HORIZONTAL,
-            "top-bottom": LayoutType.VERTICAL,
-            "center-focused": LayoutType.CENTERED,
-            "mosaic-grid": LayoutType.MOSAIC,
-            "full-bleed-image": LayoutType.FULL_BLEED
-        }
-        layout_type = layout_map.get(layout_str, LayoutType.HORIZONTAL)
+        layout_type = _LAYOUT_MAP.get(layout_str, LayoutType.HORIZONTAL)
 
         # 映射情绪类型
-        mood_map = {
-            "温暖治愈": MoodType.WARM,
-            "清新自然": MoodType.FRESH,
-            "专业简约": MoodType.PROFESSIONAL,
-            "活泼可爱": MoodType.PLAYFUL,
-            "优雅复古": MoodType.ELEGANT,
-            "现代时尚": MoodType.MODERN,
-            "艺术文艺": MoodType.ARTISTIC
-        }
-        mood_type = mood_map.get(mood_str, MoodType.WARM)
+        mood_type = _MOOD_MAP.get(mood_str, MoodType.WARM)
 
         # 构建颜色列表
         def get_color(hex_val, name):
@@ -278,54 +389,119 @@ class QwenAnalyzer(VisionAnalyzerAdapter):
     def __init__(self, api_key: str):
         super().__init__(api_key, "qwen-vl-plus")
         self.api_url = "https://dashscope.aliyuncs.com/compatible-mode/v1/chat/completions"
+        # 请求头和提示词不随调用变化，构造一次复用
+        self._headers = {
+            "Authorization": f"Bearer {api_key}",
+            "Content-Type": "application/json"
+        }
+        self._prompt = self._get_analysis_prompt()
 
     async def analyze_images(self, image_paths: List[str]) -> ImageAnalysisResult:
         """使用Qwen-VL分析图片"""
         logger.info(f"🤖 [Qwen] Analyzing {len(image_paths)} images with {self.model}")
 
-        # 准备消息
-        messages = [{
-            "role": "user",
-            "content": []
-        }]
-
-        # 添加提示词
-        prompt = self._get_analysis_prompt()
-        messages[0]["content"].append({"type": "text", "text": prompt})
-
-        # 添加图片
-        for img_path in image_paths:
-            base64_image = self._encode_image(img_path)
-            messages[0]["content"].append({
-                "type": "image_url",
-                "image_url": {"url": f"data:image/jpeg;base64,{base64_image}"}
-            })
-
-        # 构建请求
-        headers = {
-            "Authorization": f"Bearer {self.api_key}",
-            "Content-Type": "application/json"
-        }
-
+        # 按图片内容哈希查缓存，重复上传跳过整次API调用
+        cache_key = await self._analysis_cache_key(image_paths)
+        cached_result = self._analysis_cache.get(cache_key)
+        if cached_result is not None:
+            logger.info("🗃️ [Qwen] Analysis cache hit, skipping API call")
+            return cached_result
+
+        # 添加图片（有公网URL时直传URL，否则并行base64编码）
+        image_entries = await self._image_url_entries(image_paths)
+
+        # 多图并行拆分：HTTP/2多路复用下按图并发，总延迟约等于单图
+        if len(image_entries) > 1 and settings.VISION_PARALLEL:
+            analysis_result = await self._analyze_parallel(image_entries)
+            if analysis_result is None:
+                # 并行请求全部失败走mock兜底，不写缓存
+                return self._get_mock_result()
+            self._store_analysis_cache(cache_key, analysis_result)
+            return analysis_result
+
+        # 构建请求（头和提示词已在__init__缓存，这里只拼图片列表）
         payload = {
             "model": self.model,
-            "messages": messages,
+            "messages": [{
+                "role": "user",
+                "content": [{"type": "text", "text": self._prompt}, *image_entries]
+            }],
             "temperature": 0.7
         }
 
         try:
             logger.info(f"🌐 [Qwen] Sending request to {self.api_url}")
-            result = await self._make_request(self.api_url, headers, payload)
+            # 客户端侧限流，平滑突发请求
+            await qwen_bucket.acquire()
+            result = await self._make_request(self.api_url, self._headers, payload)
 
             content = result.get("choices", [{}])[0].get("message", {}).get("content", "")
             logger.info(f"✅ [Qwen] Analysis completed")
 
-            return self._parse_result(content)
+            analysis_result = self._parse_result(content)
+            if analysis_result is None:
+                # 解析失败走mock兜底，不写缓存，同图重试时可重新请求
+                return self._get_mock_result()
+            self._store_analysis_cache(cache_key, analysis_result)
+            return analysis_result
 
         except Exception as e:
             logger.error(f"❌ [Qwen] Error: {str(e)}")
             return self._get_mock_result()
 
+    async def _analyze_parallel(
+        self,
+        image_entries: List[Dict[str, Any]]
+    ) -> Optional[ImageAnalysisResult]:
+        """按图拆分为并发单图请求，再合并各图的分析结果（全部失败返回None）"""
+        async def analyze_one(entry: Dict[str, Any]) -> Optional[ImageAnalysisResult]:
+            payload = {
+                "model": self.model,
+                "messages": [{
+                    "role": "user",
+                    "content": [{"type": "text", "text": self._prompt}, entry]
+                }],
+                "temperature": 0.7
+            }
+            await qwen_bucket.acquire()
+            result = await self._make_request(self.api_url, self._headers, payload)
+            content = result.get("choices", [{}])[0].get("message", {}).get("content", "")
+            return self._parse_result(content)
+
+        try:
+            logger.info(f"🌐 [Qwen] Fanning out {len(image_entries)} parallel requests")
+            results = await asyncio.gather(
+                *(analyze_one(entry) for entry in image_entries)
+            )
+            # 只合并解析成功的结果；一张都没解析出来则交由调用方兜底
+            parsed = [r for r in results if r is not None]
+            if not parsed:
+                return None
+            return self._merge_results(parsed)
+        except Exception as e:
+            logger.error(f"❌ [Qwen] Parallel analysis error: {str(e)}")
+            return None
+
+    def _merge_results(
+        self,
+        results: List[ImageAnalysisResult]
+    ) -> ImageAnalysisResult:
+        """合并多图结果：布局/情绪取多数票，复杂度取最大值"""
+        if len(results) == 1:
+            return results[0]
+
+        merged = results[0]
+        merged.layout.type = Counter(
+            r.layout.type for r in results
+        ).most_common(1)[0][0]
+        merged.style_attributes.mood = Counter(
+            r.style_attributes.mood for r in results
+        ).most_common(1)[0][0]
+        merged.style_attributes.complexity = max(
+            r.style_attributes.complexity for r in results
+        )
+        return merged
+
     def _get_analysis_prompt(self) -> str:
         """获取Qwen分析提示词"""
         return """请分析这张书签设计图片，提取：
@@ -336,26 +512,27 @@ class QwenAnalyzer(VisionAnalyzerAdapter):
 
 返回JSON格式结果。"""
 
-    def _parse_result(self, content: str) -> ImageAnalysisResult:
-        """解析Qwen结果"""
-        import json
+    def _parse_result(self, content: str) -> Optional[ImageAnalysisResult]:
+        """解析Qwen结果（解析失败返回None，由调用方兜底）"""
         try:
-            json_start = content.find("{")
-            json_end = content.rfind("}") + 1
-            if json_start >= 0:
-                data = json.loads(content[json_start:json_end])
+            match = _JSON_RE.search(content)
+            if match:
+                data = orjson.loads(match.group(0))
                 return self._convert_to_result(data)
         except:
             pass
-        return self._get_mock_result()
+        return None
 
     def _convert_to_result(self, data: Dict) -> ImageAnalysisResult:
         """转换结果格式"""
+        layout_str = data.get("layout", "left-right")
+        mood_str = data.get("mood", "温暖治愈")
+
         return ImageAnalysisResult(
             layout=LayoutInfo(
-                type=LayoutType.HORIZONTAL,
+                type=_LAYOUT_MAP.get(layout_str, LayoutType.HORIZONTAL),
                 confidence=0.9,
-                description="左右分栏布局"
+                description=f"{layout_str}布局"
             ),
             colors=ColorScheme(
                 primary=[DesignColor(hex="#F5E6D3", name="米色")],
@@ -374,8 +551,8 @@ class QwenAnalyzer(VisionAnalyzerAdapter):
             ),
             style_attributes=StyleAttributes(
                 keywords=["简约", "优雅"],
-                mood=MoodType.WARM,
-                complexity=3,
+                mood=_MOOD_MAP.get(mood_str, MoodType.WARM),
+                complexity=data.get("complexity", 3),
                 aesthetic_tags=["留白", "居中"]
             ),
             decorative_elements=DecorativeElements(
@@ -410,38 +587,45 @@ class ClaudeAnalyzerAdapter(VisionAnalyzerAdapter):
         return await self.claude.analyze_images(image_paths)
 
 
+# 已创建的分析器实例（供close_all遍历，functools.cache不支持枚举条目）
+_analyzer_instances: List[VisionAnalyzerAdapter] = []
+
+
+@functools.cache
+def _make_analyzer(model: VisionModel) -> VisionAnalyzerAdapter:
+    """按模型创建分析器（memoize保证每种模型只构造一次SDK客户端）"""
+    if model == VisionModel.GLM:
+        analyzer = GLMAnalyzer(settings.GLM_API_KEY)
+    elif model == VisionModel.QWEN:
+        analyzer = QwenAnalyzer(settings.QWEN_API_KEY)
+    elif model == VisionModel.CLAUDE:
+        analyzer = ClaudeAnalyzerAdapter(settings.ANTHROPIC_API_KEY)
+    else:
+        raise ValueError(f"Unsupported model: {model}")
+
+    _analyzer_instances.append(analyzer)
+    logger.info(f"✅ [Factory] Created {model.value} analyzer")
+    return analyzer
+
+
 class VisionAnalyzerFactory:
     """视觉分析器工厂"""
 
-    _analyzers: Dict[VisionModel, VisionAnalyzerAdapter] = {}
-
     @classmethod
     def get_analyzer(cls, model: VisionModel = VisionModel.GLM) -> VisionAnalyzerAdapter:
         """获取指定模型的分析器"""
-        if model in cls._analyzers:
-            return cls._analyzers[model]
-
-        # 根据模型类型创建分析器
-        if model == VisionModel.GLM:
-            api_key = settings.GLM_API_KEY
-            analyzer = GLMAnalyzer(api_key)
-        elif model == VisionModel.QWEN:
-            api_key = settings.QWEN_API_KEY
-            analyzer = QwenAnalyzer(api_key)
-        elif model == VisionModel.CLAUDE:
-            api_key = settings.ANTHROPIC_API_KEY
-            analyzer = ClaudeAnalyzerAdapter(api_key)
-        else:
-            raise ValueError(f"Unsupported model: {model}")
-
-        cls._analyzers[model] = analyzer
-        logger.info(f"✅ [Factory] Created {model.value} analyzer")
-        return analyzer
+        return _make_analyzer(model)
 
     @classmethod
     def get_default_analyzer(cls) -> VisionAnalyzerAdapter:
         """获取默认分析器（GLM）"""
-        return cls.get_analyzer(VisionModel.GLM)
+        return _make_analyzer(VisionModel.GLM)
+
+    @classmethod
+    async def close_all(cls):
+        """关闭所有已创建分析器的HTTP客户端（应用关闭时调用）"""
+        for analyzer in _analyzer_instances:
+            await analyzer.aclose()
 
 
 # 全局实例
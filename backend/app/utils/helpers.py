@@ -3,6 +3,8 @@
 # 辅助工具函数
 #
 
+import asyncio
+import itertools
 import os
 import time
 import aiofiles
@@ -14,6 +16,33 @@ from loguru import logger
 
 from app.core.config import settings
 
+# DEBUG是否会被接收，导入时算一次：热路径上的debug f-string
+# 在INFO级别下连格式化都不做
+_DEBUG = logger.level(settings.LOG_LEVEL).no <= logger.level("DEBUG").no
+
+# 上传文件名序号：秒级时间戳之外再加递增后缀，杜绝同秒上传的命名冲突
+_upload_seq = itertools.count()
+
+
+def build_upload_filename(original_filename: str) -> str:
+    """
+    生成上传文件的落盘文件名
+
+    Path(...).name去掉客户端可能带的路径分隔符；时间戳之外附加
+    递增序号，同秒并发上传同名文件也不会互相覆盖。
+
+    Args:
+        original_filename: 客户端提供的原始文件名
+
+    Returns:
+        净化且防冲突的文件名
+    """
+    safe_name = Path(original_filename).name
+    file_extension = Path(safe_name).suffix
+    timestamp = time.strftime("%Y%m%d_%H%M%S")
+    seq = next(_upload_seq) & 0xFFFF
+    return f"upload_{timestamp}_{seq:04x}_{safe_name[:50]}{file_extension}"
+
 
 async def save_upload_file(
     upload_file: UploadFile,
@@ -29,37 +58,48 @@ async def save_upload_file(
     Returns:
         保存的文件路径
     """
-    logger.debug("📁 [HELPER] save_upload_file() called")
-    logger.debug(f"   - Original filename: {upload_file.filename}")
-    logger.debug(f"   - Content-Type: {upload_file.content_type}")
+    if _DEBUG:
+        logger.debug("📁 [HELPER] save_upload_file() called")
+        logger.debug(f"   - Original filename: {upload_file.filename}")
+        logger.debug(f"   - Content-Type: {upload_file.content_type}")
 
     if destination is None:
         destination = settings.UPLOAD_DIR
 
-    logger.debug(f"   - Destination: {destination}")
+    if _DEBUG:
+        logger.debug(f"   - Destination: {destination}")
 
     # 确保目标目录存在
     destination.mkdir(parents=True, exist_ok=True)
 
-    # 生成文件名
-    file_extension = Path(upload_file.filename).suffix
-    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-    filename = f"upload_{timestamp}_{upload_file.filename[:50]}{file_extension}"
+    # 生成净化且防冲突的文件名
+    filename = build_upload_filename(upload_file.filename)
     file_path = destination / filename
 
-    # 保存文件
-    logger.debug("💾 [HELPER] Writing file to disk...")
+    if _DEBUG:
+        logger.debug("💾 [HELPER] Writing file to disk...")
     write_start = time.time()
-    async with aiofiles.open(file_path, "wb") as f:
-        content = await upload_file.read()
-        write_time = time.time() - write_start
-        await f.write(content)
 
-    file_size = len(content)
+    if upload_file.size is not None and upload_file.size < (1 << 20):
+        # 小文件（<1MB）：一次读取+线程池单次write_bytes，
+        # 比逐块aiofiles少好几轮事件循环往返
+        content = await upload_file.read()
+        await asyncio.to_thread(file_path.write_bytes, content)
+        file_size = len(content)
+    else:
+        # 大文件：1MB分块流式写入，内存占用与文件大小无关
+        file_size = 0
+        async with aiofiles.open(file_path, "wb") as f:
+            while chunk := await upload_file.read(1 << 20):
+                await f.write(chunk)
+                file_size += len(chunk)
+
+    write_time = time.time() - write_start
     logger.info(f"✅ [HELPER] File saved: {filename}")
     logger.info(f"   - Size: {file_size / 1024:.2f}KB")
     logger.info(f"   - Write time: {write_time:.2f}s")
-    logger.debug(f"   - Path: {file_path}")
+    if _DEBUG:
+        logger.debug(f"   - Path: {file_path}")
 
     return str(file_path)
 
@@ -90,21 +130,25 @@ def validate_image_file(file: UploadFile) -> bool:
     Returns:
         是否为有效的图片文件
     """
-    logger.debug(f"🔍 [HELPER] Validating file type: {file.content_type}")
+    if _DEBUG:
+        logger.debug(f"🔍 [HELPER] Validating file type: {file.content_type}")
 
     if not file.content_type:
-        logger.debug("   - No content-type, rejecting")
+        if _DEBUG:
+            logger.debug("   - No content-type, rejecting")
         return False
 
-    is_valid = file.content_type in settings.ALLOWED_IMAGE_TYPES
-    logger.debug(f"   - Valid: {is_valid}")
+    is_valid = file.content_type in settings.ALLOWED_IMAGE_TYPES_SET
+    if _DEBUG:
+        logger.debug(f"   - Valid: {is_valid}")
 
     return is_valid
 
 
 def cleanup_old_files(
     directory: Path,
-    hours: int = settings.TEMP_FILE_LIFETIME_HOURS
+    hours: int = settings.TEMP_FILE_LIFETIME_HOURS,
+    cutoff_ts: Optional[float] = None
 ) -> int:
     """
     清理指定目录中超过指定时间的文件
@@ -112,45 +156,51 @@ def cleanup_old_files(
     Args:
         directory: 要清理的目录
         hours: 文件存活时间（小时）
+        cutoff_ts: 截止时间戳（可选），传入时多个目录共用同一基准
 
     Returns:
         删除的文件数量
     """
-    logger.debug(f"🧹 [HELPER] cleanup_old_files() called")
-    logger.debug(f"   - Directory: {directory}")
-    logger.debug(f"   - Max age: {hours} hours")
+    if _DEBUG:
+        logger.debug(f"🧹 [HELPER] cleanup_old_files() called")
+        logger.debug(f"   - Directory: {directory}")
+        logger.debug(f"   - Max age: {hours} hours")
 
     if not directory.exists():
-        logger.debug(f"   - Directory does not exist, skipping")
+        if _DEBUG:
+            logger.debug(f"   - Directory does not exist, skipping")
         return 0
 
-    cutoff_time = datetime.now() - timedelta(hours=hours)
-    logger.debug(f"   - Cutoff time: {cutoff_time}")
+    # 用时间戳比较，避免逐文件构造datetime对象
+    if cutoff_ts is None:
+        cutoff_ts = time.time() - hours * 3600
+    if _DEBUG:
+        logger.debug(f"   - Cutoff time: {datetime.fromtimestamp(cutoff_ts)}")
 
     deleted_count = 0
     total_size = 0
 
     try:
-        files = list(directory.iterdir())
-        logger.debug(f"   - Found {len(files)} items")
-
-        for file_path in files:
-            if file_path.is_file():
-                file_mtime = datetime.fromtimestamp(file_path.stat().st_mtime)
-                file_size = file_path.stat().st_size
-
-                if file_mtime < cutoff_time:
+        # os.scandir复用readdir返回的元数据，每个文件只有一次stat调用
+        with os.scandir(directory) as it:
+            for entry in it:
+                if not entry.is_file(follow_symlinks=False):
+                    continue
+
+                st = entry.stat()
+                if st.st_mtime < cutoff_ts:
                     try:
-                        file_path.unlink()
+                        os.unlink(entry.path)
                         deleted_count += 1
-                        total_size += file_size
-                        logger.debug(f"   - Deleted: {file_path.name} ({file_size / 1024:.2f}KB)")
+                        total_size += st.st_size
+                        if _DEBUG:
+                            logger.debug(f"   - Deleted: {entry.name} ({st.st_size / 1024:.2f}KB)")
                     except Exception as e:
-                        logger.warning(f"   - Failed to delete {file_path.name}: {e}")
+                        logger.warning(f"   - Failed to delete {entry.name}: {e}")
 
         if deleted_count > 0:
             logger.info(f"🧹 [HELPER] Deleted {deleted_count} files ({total_size / 1024:.2f}KB) from {directory.name}")
-        else:
+        elif _DEBUG:
             logger.debug(f"   - No files to delete")
 
     except Exception as e:
@@ -159,9 +209,9 @@ def cleanup_old_files(
     return deleted_count
 
 
-def cleanup_all_temp_files() -> dict:
+async def cleanup_all_temp_files() -> dict:
     """
-    清理所有临时文件
+    清理所有临时文件（两个目录在线程池中并行扫描，不阻塞事件循环）
 
     Returns:
         清理统计信息
@@ -169,16 +219,19 @@ def cleanup_all_temp_files() -> dict:
     logger.info("🧹 [HELPER] cleanup_all_temp_files() called")
     cleanup_start = time.time()
 
+    # 截止时间只算一次，两个目录共用同一基准
+    cutoff_ts = time.time() - settings.TEMP_FILE_LIFETIME_HOURS * 3600
+    upload_n, temp_n = await asyncio.gather(
+        asyncio.to_thread(cleanup_old_files, settings.UPLOAD_DIR, cutoff_ts=cutoff_ts),
+        asyncio.to_thread(cleanup_old_files, settings.TEMP_DIR, cutoff_ts=cutoff_ts),
+    )
+
     stats = {
-        "upload_dir": 0,
-        "temp_dir": 0,
-        "total": 0
+        "upload_dir": upload_n,
+        "temp_dir": temp_n,
+        "total": upload_n + temp_n
     }
 
-    stats["upload_dir"] = cleanup_old_files(settings.UPLOAD_DIR)
-    stats["temp_dir"] = cleanup_old_files(settings.TEMP_DIR)
-    stats["total"] = stats["upload_dir"] + stats["temp_dir"]
-
     cleanup_time = time.time() - cleanup_start
     logger.info(f"✅ [HELPER] Cleanup completed in {cleanup_time:.2f}s: {stats}")
     return stats
@@ -0,0 +1,49 @@
+#
+# rate_limit.py
+# 异步令牌桶限流器（客户端侧调用节流）
+#
+
+import asyncio
+import time
+
+
+class AsyncTokenBucket:
+    """
+    异步令牌桶：平滑对外部API的突发调用，避免触发服务端429重试
+
+    rate: 每秒补充的令牌数（即稳态QPS上限）
+    capacity: 桶容量（允许的突发量）
+    """
+
+    def __init__(self, rate: float, capacity: float):
+        self._rate = rate
+        self._capacity = capacity
+        self._tokens = capacity
+        self._last_refill = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    def _refill(self):
+        """按流逝时间补充令牌（调用方需持有锁）"""
+        now = time.monotonic()
+        self._tokens = min(
+            self._capacity,
+            self._tokens + (now - self._last_refill) * self._rate
+        )
+        self._last_refill = now
+
+    async def acquire(self):
+        """获取一个令牌，不足时等待补充（sleep在锁外，不串行化其他协程）"""
+        while True:
+            async with self._lock:
+                self._refill()
+                if self._tokens >= 1.0:
+                    self._tokens -= 1.0
+                    return
+                wait = (1.0 - self._tokens) / self._rate
+            await asyncio.sleep(wait)
+
+
+# 各外部服务一桶：稳态5 QPS，允许10次突发
+glm_bucket = AsyncTokenBucket(rate=5.0, capacity=10.0)
+qwen_bucket = AsyncTokenBucket(rate=5.0, capacity=10.0)
+claude_bucket = AsyncTokenBucket(rate=5.0, capacity=10.0)